@@ -1,17 +1,23 @@
 import os
-from flask import Flask, render_template, request, redirect, url_for, flash, session, make_response, send_file, jsonify
-import json
+import click
+from flask import Flask, render_template, request, redirect, url_for, flash, session, make_response, jsonify, Response, stream_with_context
+import csv
 import datetime
 import uuid  # For generating unique IDs
 import logging
 import secrets
+import hashlib
 import sys
 import html
+from functools import wraps
 from dotenv import load_dotenv
 import db_handler_orm as db_handler
 from db_handler_orm import get_profiles, validate_profile, get_profile_data, save_profile, delete_profile
 from flask_migrate import Migrate
 from database import init_db
+from db_orm import engine, get_pool_stats
+import profile_export
+import metrics
 
 load_dotenv()
 # ^ Loads .env for local secrets. On Render, secrets come from Render's Environment tab, not .env.
@@ -44,17 +50,25 @@ if not os.environ.get("SYNC_TOKEN"):
 app = Flask(__name__)
 app.secret_key = os.environ.get("SECRET_KEY")
 ADMIN_BACKUP_KEY = os.environ.get("ADMIN_BACKUP_KEY")
+# /metrics is disabled unless a scrape token is configured
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
 
 # Initialize database and migrations
 db = init_db(app)
 migrate = Migrate(app, db)
 
+# Per-request latency and SQL counters for /metrics
+metrics.init_app(app, engine)
+
 # Configure session security
 app.config['SESSION_COOKIE_SECURE'] = os.environ.get("FLASK_ENV") == "production"  # HTTPS only in production
 app.config['SESSION_COOKIE_HTTPONLY'] = True  # Prevent JavaScript access
 app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'  # CSRF protection
 app.config['PERMANENT_SESSION_LIFETIME'] = datetime.timedelta(hours=2)  # 2 hour timeout
 
+# Static URLs carry the file's mtime (see static_cache_buster), so browsers may keep them for a year
+app.config['SEND_FILE_MAX_AGE_DEFAULT'] = 60 * 60 * 24 * 365
+
 # Add CSRF protection
 try:
     from flask_wtf.csrf import CSRFProtect, CSRFError
@@ -190,18 +204,47 @@ def get_current_profile():
         return session["current_profile"]
     profile_uuid = request.cookies.get("profile_uuid")
     if profile_uuid:
-        profiles = db_handler.get_profiles()
-        for name, data in profiles.items():
-            if data.get("uuid") == profile_uuid:
-                session["current_profile"] = name
-                return name
+        name = db_handler.get_profile_name_by_uuid(profile_uuid)
+        if name:
+            session["current_profile"] = name
+            return name
     flash("No profile currently selected. Please select or create a profile to continue tracking your calories.", "error")
     return None
 
-def get_previous_date(date_str):
-    date = datetime.datetime.strptime(date_str, "%Y-%m-%d")
-    prev_date = date - datetime.timedelta(days=1)
-    return prev_date.strftime("%Y-%m-%d")
+def profile_etag(date_dependent=False):
+    """Serve a profile's read-only JSON with an ETag and answer If-None-Match with 304.
+
+    The validator is the profile's data version, looked up before the view
+    runs, so an unchanged resource costs one query. The query string (date
+    windows, page size and cursor) is hashed into it, so each window or page
+    validates separately. Views whose output also depends on the server date
+    pass date_dependent=True. Responses are
+    marked private, no-cache so browsers keep them but always revalidate.
+    """
+    def decorator(f):
+        @wraps(f)
+        def wrapper(profile_name, *args, **kwargs):
+            version = db_handler.get_profile_data_version(profile_name)
+            if version is None:
+                return jsonify({"error": "Profile does not exist. Please verify the profile name is correct and has not been deleted."}), 404
+            etag = "{}-{}".format(*version)
+            if request.args:
+                query = repr(sorted(request.args.items(multi=True))).encode("utf-8")
+                etag += "-" + hashlib.sha1(query).hexdigest()[:16]
+            if date_dependent:
+                etag += "-" + datetime.date.today().isoformat()
+            if request.if_none_match.contains_weak(etag):
+                response = make_response("", 304)
+            else:
+                response = make_response(f(profile_name, *args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag, weak=True)
+            # Per-profile data: browsers may keep it but must revalidate (cheap with the ETag)
+            response.headers["Cache-Control"] = "private, no-cache"
+            return response
+        return wrapper
+    return decorator
 
 def get_user_today():
     """Get the user's local date from the cookie, fallback to server date if missing/invalid. Warn if device date is off from server date."""
@@ -265,21 +308,14 @@ def home():
     today, date_warning = get_user_today()
     db_handler.initialize_daily_log(profile_name, today)
 
-    weekly_log = db_handler.get_weekly_log(profile_name)
-    food_database = db_handler.get_food_database(profile_name)
-
     # Synchronize the weekly_log with the food_database
     db_handler.synchronize_weekly_log(profile_name, today)
 
     # Recalculate total calories for the day based on the updated weekly_log
     total_calories = db_handler.calculate_total_calories(profile_name, today)
     
-    # Retrieve the updated daily calorie limit for the current day
-    daily_calories = db_handler.get_daily_calories(profile_name, today)
-    if daily_calories is None:
-        prev_date = get_previous_date(today)
-        prev_limit = db_handler.get_daily_calories(profile_name, prev_date)
-        daily_calories = prev_limit if prev_limit is not None else 2000
+    # Retrieve the daily calorie limit in force for the current day
+    daily_calories = db_handler.get_daily_calories(profile_name, today) or 2000
     
     # Calculate progress as a float (can be >1 if over limit)
     progress = total_calories / daily_calories if daily_calories else 0
@@ -308,30 +344,28 @@ def home():
     # Get previous weight (yesterday or most recent before today)
     previous_weight = db_handler.get_previous_weight(profile_name, today)
 
-    # Get weekly comparison data
-    weekly_data_raw = db_handler.get_weekly_data(profile_name)
+    # Get weekly comparison data for the last 14 days only
+    today_date = datetime.datetime.strptime(today, "%Y-%m-%d")
+    window_start = (today_date - datetime.timedelta(days=13)).strftime("%Y-%m-%d")
+    current_week_start = (today_date - datetime.timedelta(days=6)).strftime("%Y-%m-%d")
+    weekly_data_raw = db_handler.get_weekly_data(profile_name, window_start, today)
     current_week_avg = 0
     last_week_avg = 0
     
     if weekly_data_raw:
-        # Extract just the calorie values
-        weekly_calories = [day['total_calories'] for day in weekly_data_raw]
-        
         # Calculate current week average (last 7 days including today)
-        if len(weekly_calories) > 0:
-            current_week_data = weekly_calories[:7]
-            current_week_total = sum(current_week_data)
-            current_week_days = len([d for d in current_week_data if d > 0])
-            if current_week_days > 0:
-                current_week_avg = int(round(current_week_total / current_week_days))
+        current_week_data = [day['total_calories'] for day in weekly_data_raw if day['date'] >= current_week_start]
+        current_week_total = sum(current_week_data)
+        current_week_days = len([d for d in current_week_data if d > 0])
+        if current_week_days > 0:
+            current_week_avg = int(round(current_week_total / current_week_days))
         
         # Calculate previous week average (days 8-14)
-        if len(weekly_calories) >= 14:
-            last_week_data = weekly_calories[7:14]
-            last_week_total = sum(last_week_data)
-            last_week_days = len([d for d in last_week_data if d > 0])
-            if last_week_days > 0:
-                last_week_avg = int(round(last_week_total / last_week_days))
+        last_week_data = [day['total_calories'] for day in weekly_data_raw if day['date'] < current_week_start]
+        last_week_total = sum(last_week_data)
+        last_week_days = len([d for d in last_week_data if d > 0])
+        if last_week_days > 0:
+            last_week_avg = int(round(last_week_total / last_week_days))
     
     week_trend = None
     if current_week_avg > 0 and last_week_avg > 0:
@@ -404,15 +438,12 @@ def select_profile():
         logging.debug(f"Received profile_name: {profile_name}")
         if profile_name not in profiles:
             db_handler.save_profile(profile_name, {
-                "weekly_log": {},
-                "food_database": {},
                 "weight_goal": None,
-                "weights": {},
                 "uuid": str(uuid.uuid4())
             })
             logging.info(f"New profile created: {profile_name}")
         session["current_profile"] = profile_name
-        profile_uuid = db_handler.get_profiles()[profile_name]["uuid"]
+        profile_uuid = db_handler.get_profile_uuid(profile_name)
         resp = make_response(redirect(url_for("home")))
         resp.set_cookie("profile_uuid", profile_uuid, max_age=60*60*24*365, secure=True, httponly=True)
         flash(f"Welcome, {profile_name}! Your profile has been selected.", "success")
@@ -466,14 +497,13 @@ def magic_login():
     if not uuid_param:
         flash("Invalid magic link. The link format is incorrect or missing required parameters. Please request a new magic link.", "error")
         return redirect(url_for("select_profile"))
-    profiles = db_handler.get_profiles()
-    for name, data in profiles.items():
-        if data.get("uuid") == uuid_param:
-            session["current_profile"] = name
-            resp = make_response(redirect(url_for("home")))
-            resp.set_cookie("profile_uuid", uuid_param, max_age=60*60*24*365, secure=True, httponly=True)
-            flash(f"Welcome, {name}! You have been logged in via magic link.", "success")
-            return resp
+    name = db_handler.get_profile_name_by_uuid(uuid_param)
+    if name:
+        session["current_profile"] = name
+        resp = make_response(redirect(url_for("home")))
+        resp.set_cookie("profile_uuid", uuid_param, max_age=60*60*24*365, secure=True, httponly=True)
+        flash(f"Welcome, {name}! You have been logged in via magic link.", "success")
+        return resp
     flash("Invalid or expired magic link. The link may have been used already or the profile no longer exists. Please log in normally or request a new magic link.", "error")
     return redirect(url_for("select_profile"))
 
@@ -489,8 +519,46 @@ def download_profiles():
     
     if not token or not secrets.compare_digest(token, expected_token):
         return jsonify({"error": "Unauthorized"}), 401
-    # Send the profiles.json file as a download
-    return send_file(db_handler.get_profiles_file_path(), as_attachment=True)
+    profile_name = request.args.get("profile")
+    if profile_name and not validate_profile(profile_name):
+        return jsonify({"error": "Profile does not exist. Please verify the profile name is correct and has not been deleted."}), 404
+    return export_response(profile_name, "calorie_tracker_export")
+
+@app.route("/export")
+def export_profile():
+    """Download the current profile's full history."""
+    profile_name = get_current_profile()
+    if not profile_name:
+        return redirect(url_for("select_profile"))
+    return export_response(profile_name, "calorie_tracker_" + profile_name.replace(" ", "_"))
+
+def export_response(profile_name, basename):
+    """Stream an export; ?format=ndjson|csv (default ndjson) and ?gzip=1 choose the encoding."""
+    fmt = request.args.get("format", "ndjson")
+    if fmt not in profile_export.FORMATS:
+        return jsonify({"error": "Invalid format. Use 'ndjson' or 'csv'."}), 400
+    compress = request.args.get("gzip", "").lower() in ("1", "true", "yes")
+    chunks, mimetype, extension = profile_export.serialize(
+        db_handler.iter_export_records(profile_name), fmt, compress
+    )
+    response = Response(stream_with_context(chunks), mimetype=mimetype)
+    response.headers["Content-Disposition"] = f'attachment; filename="{basename}.{extension}"'
+    return response
+
+def admin_token_valid():
+    """Check the X-Admin-Key header (or ?token=) against ADMIN_BACKUP_KEY."""
+    token = request.headers.get("X-Admin-Key") or request.args.get("token")
+    return bool(token and ADMIN_BACKUP_KEY and secrets.compare_digest(token, ADMIN_BACKUP_KEY))
+
+@app.route("/internal/stats")
+def internal_stats():
+    """Per-worker connection pool and profile cache statistics for capacity planning."""
+    if not admin_token_valid():
+        return jsonify({"error": "Unauthorized"}), 401
+    return jsonify({
+        "pool": get_pool_stats(),
+        "profile_cache": db_handler.get_profile_cache_stats()
+    })
 
 @app.route("/set_goal", methods=["GET", "POST"])
 def set_goal():
@@ -533,7 +601,6 @@ def add_food():
         return redirect(url_for("select_profile"))
     today, _ = get_user_today()
     db_handler.initialize_daily_log(profile_name, today)
-    food_database = db_handler.get_food_database(profile_name)
     
     
     if request.method == "POST":
@@ -589,18 +656,17 @@ def add_food():
                 'meal_type': request.form.get("meal_type", ""),
                 'quantity': "" if "quantity" in error_msg else request.form.get("quantity", "")
             }
-            sorted_food_database = sorted(food_database.items())
+            # Foods are fetched from /api/food_search; only a kept selection is rendered
+            selected_calories = db_handler.get_food_calories(profile_name, form_data['food_name']) if form_data['food_name'] else None
             return render_template(
                 "add_food.html",
                 meal_types=["breakfast", "lunch", "dinner", "snack"],
-                food_database=sorted_food_database,
+                selected_food=(form_data['food_name'], selected_calories) if selected_calories is not None else None,
                 form_data=form_data
             )
-    sorted_food_database = sorted(food_database.items())
     return render_template(
         "add_food.html",
-        meal_types=["breakfast", "lunch", "dinner", "snack"],
-        food_database=sorted_food_database
+        meal_types=["breakfast", "lunch", "dinner", "snack"]
     )
 
 @app.route("/delete_food_entry", methods=["POST"])
@@ -709,6 +775,24 @@ def edit_food_in_database():
         food_database=food_database
     )
 
+@app.route("/api/food_search")
+def api_food_search():
+    """Prefix search of the food database, e.g. /api/food_search?q=app&limit=10.
+
+    Pass fuzzy=1 to also return close matches for misspelled names.
+    """
+    profile_name = request.args.get("profile") or get_current_profile()
+    if not profile_name or not validate_profile(profile_name):
+        return jsonify({"error": "No profile selected. Please provide a valid profile name in the 'profile' query parameter to access this endpoint."}), 401
+    limit = min(max(request.args.get("limit", 10, type=int), 1), 50)
+    fuzzy = request.args.get("fuzzy", "").lower() in ("1", "true", "yes")
+    results = db_handler.search_foods(profile_name, request.args.get("q", "").strip(), limit, fuzzy=fuzzy)
+    return jsonify({"results": results})
+
+if limiter:
+    # Called on every keystroke of the add-food search box; the default per-IP limits would blank it within minutes
+    limiter.exempt(api_food_search)
+
 @app.route("/get_food_calories")
 def get_food_calories_api():
     profile_name = get_current_profile()
@@ -867,7 +951,7 @@ def history():
     if end_date and not is_valid_date(end_date, min_year=2020, max_year=datetime.datetime.utcnow().year+1):
         end_date = None
         flash("End date is not valid. Please use format: YYYY-MM-DD (e.g., 2024-12-31). The year must be between 2020 and next year. Showing all history instead.", "error")
-    page = int(request.args.get("page", 1))
+    page = max(request.args.get("page", 1, type=int), 1)
     per_page = 5
     # Get paginated history data
     paginated_history, total_items = db_handler.get_history(profile_name, start_date, end_date, page, per_page)
@@ -902,19 +986,68 @@ def weight_history():
     profile_name = get_current_profile()
     if not profile_name:
         return redirect(url_for("select_profile"))
-    weights = db_handler.get_weights(profile_name)
+    start_date = request.args.get("start_date")
+    end_date = request.args.get("end_date")
+    if start_date and not is_valid_date(start_date):
+        start_date = None
+        flash("Start date is not valid. Please use format: YYYY-MM-DD (e.g., 2024-01-15). Showing all weights instead.", "error")
+    if end_date and not is_valid_date(end_date):
+        end_date = None
+        flash("End date is not valid. Please use format: YYYY-MM-DD (e.g., 2024-12-31). Showing all weights instead.", "error")
+    weights = db_handler.get_weights(profile_name, start_date, end_date)
     weight_goal = db_handler.get_weight_goal(profile_name)
     return render_template(
         "weight_history.html",
-        weights=sorted(weights.items()),
+        weights=list(weights.items()),
         profile_name=profile_name,
-        weight_goal=weight_goal
+        weight_goal=weight_goal,
+        start_date=start_date,
+        end_date=end_date
     )
 
 @app.route("/healthz")
 def healthz():
     return "OK", 200
 
+def _cache_and_pool_metrics():
+    caches = db_handler.get_cache_stats()
+    pool = get_pool_stats()
+    return [
+        ("cache_hits_total", "counter", "In-process cache lookups served from memory.",
+         [({"cache": name}, stats["hits"]) for name, stats in caches.items()]),
+        ("cache_misses_total", "counter", "In-process cache lookups that went to the database.",
+         [({"cache": name}, stats["misses"]) for name, stats in caches.items()]),
+        ("cache_entries", "gauge", "Entries held by each in-process cache.",
+         [({"cache": name}, stats["entries"]) for name, stats in caches.items()]),
+        ("db_pool_checked_out", "gauge", "Database connections currently checked out.",
+         [({}, pool["checked_out"])]),
+        ("db_pool_checkouts_total", "counter", "Database connection checkouts.",
+         [({}, pool["checkouts"])]),
+        ("db_pool_timeouts_total", "counter", "Checkouts that timed out waiting for a connection.",
+         [({}, pool["timeouts"])]),
+        ("db_pool_wait_seconds_total", "counter", "Time spent waiting to check out a database connection.",
+         [({}, pool["wait_seconds_total"])]),
+        ("db_pool_hold_seconds_total", "counter", "Time database connections spent checked out.",
+         [({}, pool["hold_seconds_total"])]),
+    ]
+
+metrics.metrics.add_collector(_cache_and_pool_metrics)
+
+@app.route("/metrics")
+def metrics_endpoint():
+    """Prometheus text-format metrics for this worker (Authorization: Bearer $METRICS_TOKEN or ?token=)."""
+    if not METRICS_TOKEN:
+        return "Not Found", 404
+    auth = request.headers.get("Authorization", "")
+    token = auth[len("Bearer "):] if auth.startswith("Bearer ") else request.args.get("token")
+    if not token or not secrets.compare_digest(token, METRICS_TOKEN):
+        return "Unauthorized", 401
+    return Response(metrics.metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+if limiter:
+    # Scrapers poll far more often than the default per-IP limits allow
+    limiter.exempt(metrics_endpoint)
+
 # --- Profile Management ---
 @app.route("/api/profiles", methods=["GET"])
 def api_get_profiles():
@@ -942,25 +1075,22 @@ def api_create_profile():
         return jsonify({"error": f"Failed to create profile: {str(e)}"}), 500
 
 @app.route("/api/profile/<profile_name>", methods=["GET"])
+@profile_etag()
 def get_profile_details(profile_name):
     try:
         profile_data = db_handler.get_profile_data(profile_name)
         if not profile_data:
             return jsonify({"error": "Profile not found. The requested profile does not exist. Please check the profile name and try again."}), 404
 
-        # Convert from JSON strings to dicts
-        weights_raw = profile_data.get("weights", {})
-        weights = json.loads(weights_raw) if isinstance(weights_raw, str) else weights_raw
-        daily_calories_raw = profile_data.get("daily_calories", {})
-        daily_calories = json.loads(daily_calories_raw) if isinstance(daily_calories_raw, str) else daily_calories_raw
-        
+        weights = db_handler.get_weights(profile_name)
+        daily_calories = db_handler.get_daily_calorie_targets(profile_name)
 
         return jsonify({
             "name": profile_name,
             "weight_goal": profile_data.get("weight_goal"),
             "weights": weights,
             "daily_calories": daily_calories,
-            "uuid": profile_data.get("uuid"),
+            "uuid": db_handler.get_profile_uuid(profile_name) or profile_data.get("uuid"),
         })
 
     except Exception as e:
@@ -1072,11 +1202,109 @@ def api_add_food():
     db_handler.add_food_to_log(profile_name, today, meal_type, food_id, food_name, calories, quantity)
     return jsonify({"success": True, "food_id": food_id})
 
+# --- /api/log/batch endpoint (offline queue flush) ---
+MAX_BATCH_ENTRIES = 500
+
+@app.route("/api/log/batch", methods=["POST"])
+def api_log_batch():
+    profile_name = request.args.get("profile")
+    if not profile_name or not validate_profile(profile_name):
+        return jsonify({"error": "No profile selected. Please provide a valid profile name in the 'profile' query parameter to access this endpoint."}), 401
+    data = request.get_json(silent=True) or {}
+    items = data.get("entries")
+    if not isinstance(items, list) or not items:
+        return jsonify({"error": "Request body must contain a non-empty 'entries' list."}), 400
+    if len(items) > MAX_BATCH_ENTRIES:
+        return jsonify({"error": f"Too many entries. A batch may contain at most {MAX_BATCH_ENTRIES} entries."}), 413
+    today = datetime.date.today().isoformat()
+    results = []
+    valid = []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            results.append({"index": index, "status": "error", "error": "Entry must be an object."})
+            continue
+        date = item.get("date") or today
+        food_name = str(item.get("food_name") or "").strip()
+        meal_type = item.get("meal_type")
+        food_id = str(item.get("food_id") or uuid.uuid4())
+        error = None
+        try:
+            quantity = int(item.get("quantity", 1))
+        except (TypeError, ValueError):
+            quantity = 0
+        try:
+            calories = int(item.get("calories"))
+        except (TypeError, ValueError):
+            calories = 0
+        if not is_valid_date(date):
+            error = "Invalid date. Use YYYY-MM-DD."
+        elif meal_type not in ["breakfast", "lunch", "dinner", "snack"]:
+            error = "Invalid meal type. Please specify one of: breakfast, lunch, dinner, or snack."
+        elif not food_name:
+            error = "Food name is required."
+        elif quantity < 1:
+            error = "Quantity must be a positive whole number (1 or greater)."
+        elif calories <= 0:
+            error = "Calories must be a positive whole number (minimum 1)."
+        if error:
+            results.append({"index": index, "status": "error", "error": error})
+            continue
+        results.append({"index": index, "food_id": food_id, "status": None})
+        valid.append({
+            "date": date,
+            "meal_type": meal_type,
+            "food_id": food_id,
+            "food_name": food_name,
+            "calories": calories,
+            "quantity": quantity
+        })
+    try:
+        statuses = db_handler.add_food_entries(profile_name, valid)
+    except Exception as e:
+        logging.error(f"Batch log for '{profile_name}' failed: {e}")
+        return jsonify({"error": "Failed to save entries. No entries from this batch were logged. Please retry."}), 500
+    pending = iter(statuses)
+    for result in results:
+        if result["status"] is None:
+            result["status"] = next(pending)
+    created = sum(1 for result in results if result["status"] == "created")
+    return jsonify({"success": True, "created": created, "results": results})
+
+# --- /api/sync endpoint (delta sync) ---
+@app.route("/api/sync", methods=["GET"])
+def api_sync():
+    profile_name = request.args.get("profile")
+    if not profile_name or not validate_profile(profile_name):
+        return jsonify({"error": "No profile selected. Please provide a valid profile name in the 'profile' query parameter to access this endpoint."}), 401
+    since = request.args.get("since", 0, type=int)
+    limit = request.args.get("limit", 500, type=int)
+    if since < 0 or not 1 <= limit <= 1000:
+        return jsonify({"error": "Invalid parameters. 'since' must be a cursor returned by a previous sync (or 0) and 'limit' must be between 1 and 1000."}), 400
+    return jsonify(db_handler.get_changes(profile_name, since, limit))
+
+# --- /api/import endpoint (bulk history import) ---
+@app.route("/api/import/<profile_name>", methods=["POST"])
+@rate_limit(profile_limits)
+def api_import(profile_name):
+    """Load an export-format body (NDJSON or CSV, optionally gzipped) into a profile."""
+    if not validate_profile(profile_name):
+        return jsonify({"error": "Profile does not exist. Please verify the profile name is correct and has not been deleted."}), 404
+    fmt, _ = profile_export.detect_format(mimetype=request.mimetype)
+    fmt = request.args.get("format", fmt)
+    if fmt not in profile_export.FORMATS:
+        return jsonify({"error": "Invalid format. Use 'ndjson' or 'csv'."}), 400
+    compressed = (request.headers.get("Content-Encoding") == "gzip"
+                  or request.args.get("gzip", "").lower() in ("1", "true", "yes"))
+    try:
+        stats = db_handler.import_records(profile_name, profile_export.parse(request.stream, fmt, compressed))
+    except (OSError, EOFError, UnicodeDecodeError, csv.Error) as e:
+        return jsonify({"error": f"Could not read the upload: {e}"}), 400
+    return jsonify({"success": True, **stats})
+
 # --- /api/food_database endpoints ---
 @app.route("/api/food_database/<profile_name>", methods=["GET"])
+@profile_etag()
 def api_get_food_database(profile_name):
-    if not validate_profile(profile_name):
-        return jsonify({"error": "Profile does not exist. Please verify the profile name is correct and has not been deleted."}), 404
     db = db_handler.get_food_database(profile_name)
     return jsonify(db)
 
@@ -1087,6 +1315,14 @@ def api_add_food_db(profile_name):
     data = request.get_json()
     name = data.get("food_name")
     calories = data.get("calories")
+    if not name:
+        return jsonify({"error": "Food name is required. Please provide a non-empty food name to add to your food database."}), 400
+    try:
+        calories = int(calories)
+        if calories < 1:
+            raise ValueError
+    except Exception:
+        return jsonify({"error": "Calories must be a positive whole number (minimum 1). Please provide a valid calorie count for this food item."}), 400
     db_handler.set_food_calories(profile_name, name, calories)
     return jsonify({"success": True})
 
@@ -1100,12 +1336,14 @@ def api_delete_food(profile_name, food_name):
 # --- History, Log, Weight, and Goal APIs ---
 
 @app.route("/api/history/<profile_name>", methods=["GET"])
+@profile_etag()
 def api_get_history(profile_name):
-    if not validate_profile(profile_name):
-        return jsonify({"error": "Profile does not exist. Please verify the profile name is correct and has not been deleted."}), 404
     start = request.args.get("start")
     end = request.args.get("end")
-    history = db_handler.get_history(profile_name, start, end)
+    # Optional keyset paging: ?limit=N&before=YYYY-MM-DD returns the N days before that date
+    limit = request.args.get("limit", type=int)
+    before = request.args.get("before")
+    history = db_handler.get_history(profile_name, start, end, per_page=limit, before=before)
     return jsonify(history)
 
 @app.route("/api/log/<profile_name>/<date>/<meal_type>/<food_id>", methods=["DELETE"])
@@ -1137,10 +1375,9 @@ def api_log_weight(profile_name):
     return jsonify({"success": True})
 
 @app.route("/api/weight/<profile_name>", methods=["GET"])
+@profile_etag()
 def api_get_weights(profile_name):
-    if not validate_profile(profile_name):
-        return jsonify({"error": "Profile does not exist. Please verify the profile name is correct and has not been deleted."}), 404
-    weights = db_handler.get_weights(profile_name)
+    weights = db_handler.get_weights(profile_name, request.args.get("start"), request.args.get("end"))
     return jsonify(weights)
 
 @app.route("/api/goal/<profile_name>", methods=["POST"])
@@ -1153,17 +1390,15 @@ def api_set_goal(profile_name):
     return jsonify({"success": True})
 
 @app.route("/api/goal/<profile_name>", methods=["GET"])
+@profile_etag()
 def api_get_goal(profile_name):
-    if not validate_profile(profile_name):
-        return jsonify({"error": "Profile does not exist. Please verify the profile name is correct and has not been deleted."}), 404
     goal = db_handler.get_weight_goal(profile_name)
     return jsonify({"weight_goal": goal})
 
 # --- Calorie Graph and Weight History APIs ---
 @app.route("/api/calorie_graph/<profile_name>", methods=["GET"])
+@profile_etag(date_dependent=True)
 def api_calorie_graph(profile_name):
-    if not validate_profile(profile_name):
-        return jsonify({"error": "Profile does not exist. Please verify the profile name is correct and has not been deleted."}), 404
     today = datetime.date.today().isoformat()
     meal_calories = db_handler.get_meal_calories(profile_name, today)
     weekly_data = db_handler.get_weekly_data(profile_name)
@@ -1173,24 +1408,90 @@ def api_calorie_graph(profile_name):
     })
 
 @app.route("/api/weight_history/<profile_name>", methods=["GET"])
+@profile_etag()
 def api_weight_history(profile_name):
-    if not validate_profile(profile_name):
-        return jsonify({"error": "Profile does not exist. Please verify the profile name is correct and has not been deleted."}), 404
-    weights = db_handler.get_weights(profile_name)
+    weights = db_handler.get_weights(profile_name, request.args.get("start"), request.args.get("end"))
     weight_goal = db_handler.get_weight_goal(profile_name)
     return jsonify({
         "weights": weights,
         "weight_goal": weight_goal
     })
 
+@app.url_defaults
+def static_cache_buster(endpoint, values):
+    """Append the file's mtime to static URLs so a changed file gets a new URL."""
+    if endpoint == "static" and "filename" in values:
+        try:
+            values["v"] = int(os.stat(os.path.join(app.static_folder, values["filename"])).st_mtime)
+        except OSError:
+            pass
+
 @app.after_request
 def add_header(response):
-    """Add headers to disable caching."""
+    """Set caching headers: long-lived static files, no-store unless the view chose a policy."""
+    if request.endpoint == "static":
+        # send_static_file already set public, max-age=SEND_FILE_MAX_AGE_DEFAULT
+        if "v" in request.args:
+            response.cache_control.immutable = True
+        return response
+    if "Cache-Control" in response.headers:
+        # e.g. profile_etag's revalidated responses
+        return response
     response.headers["Cache-Control"] = "no-store, no-cache, must-revalidate, post-check=0, pre-check=0, max-age=0"
     response.headers["Pragma"] = "no-cache"
     response.headers["Expires"] = "-1"
     return response
 
+# --- CLI commands ---
+@app.cli.command("rebuild-daily-totals")
+@click.option("--profile", "profile_name", default=None, help="Only rebuild this profile.")
+def rebuild_daily_totals_command(profile_name):
+    """Backfill the daily_totals table from weekly_log."""
+    count = db_handler.rebuild_daily_totals(profile_name)
+    click.echo(f"Rebuilt {count} daily total rows.")
+
+@app.cli.command("sync-food-calories")
+@click.option("--profile", "profile_name", default=None, help="Only sync this profile.")
+@click.option("--since", required=True, help="First date to recompute (YYYY-MM-DD).")
+@click.option("--until", default=None, help="Last date to recompute (default today).")
+def sync_food_calories_command(profile_name, since, until):
+    """Recompute past log entries from current food calories, keeping manual overrides."""
+    until = until or datetime.date.today().isoformat()
+    profile_names = [profile_name] if profile_name else sorted(db_handler.get_profiles())
+    count = sum(db_handler.synchronize_weekly_log(name, until, start=since) for name in profile_names)
+    click.echo(f"Updated {count} log entries.")
+
+@app.cli.command("export-profiles")
+@click.option("--profile", "profile_name", default=None, help="Only export this profile.")
+@click.option("--format", "fmt", type=click.Choice(sorted(profile_export.FORMATS)), default="ndjson")
+@click.option("--gzip", "compress", is_flag=True, help="Gzip the output.")
+@click.option("--output", "-o", type=click.Path(dir_okay=False), default=None, help="File to write (default stdout).")
+def export_profiles_command(profile_name, fmt, compress, output):
+    """Stream profiles, foods, weights, targets and log entries to a file."""
+    chunks, _, _ = profile_export.serialize(db_handler.iter_export_records(profile_name), fmt, compress)
+    with click.open_file(output or "-", "wb") as out:
+        for chunk in chunks:
+            out.write(chunk if isinstance(chunk, bytes) else chunk.encode("utf-8"))
+
+@app.cli.command("import-profile")
+@click.argument("profile_name")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False, allow_dash=True))
+@click.option("--format", "fmt", type=click.Choice(sorted(profile_export.FORMATS)), default=None,
+              help="Input format (default: from the file extension).")
+@click.option("--chunk-size", default=5000, show_default=True, help="Records per transaction.")
+def import_profile_command(profile_name, path, fmt, chunk_size):
+    """Bulk-load an NDJSON/CSV export (optionally .gz) into an existing profile."""
+    if not validate_profile(profile_name):
+        raise click.ClickException(f"Profile '{profile_name}' does not exist.")
+    detected, compressed = profile_export.detect_format(path)
+    with click.open_file(path, "rb") as stream:
+        stats = db_handler.import_records(
+            profile_name, profile_export.parse(stream, fmt or detected, compressed), chunk_size
+        )
+    for error in stats.pop("errors"):
+        click.echo(f"record {error['record']}: {error['error']}", err=True)
+    click.echo(", ".join(f"{key}={value}" for key, value in stats.items()))
+
 # Run the app
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 5000))
@@ -0,0 +1,90 @@
+"""Benchmark the in-memory food search index on a synthetic 10k-food database.
+
+Run from the repository root:
+
+    python benchmarks/food_search_bench.py [--foods 10000] [--queries 2000]
+
+Prints build time and per-query latency percentiles for prefix search, fuzzy
+(trigram) search and incremental updates. Needs no database.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from food_index import FoodIndex  # noqa: E402
+
+WORDS = [
+    "chicken", "breast", "thigh", "beef", "steak", "pork", "chop", "salmon", "tuna", "cod",
+    "broccoli", "carrot", "spinach", "potato", "sweet", "rice", "brown", "white", "pasta", "bread",
+    "wholemeal", "apple", "banana", "orange", "grape", "strawberry", "yoghurt", "greek", "milk",
+    "cheese", "cheddar", "egg", "omelette", "fried", "boiled", "roast", "grilled", "baked", "soup",
+    "tomato", "lentil", "bean", "black", "kidney", "oat", "porridge", "granola", "peanut", "butter",
+    "almond", "cashew", "walnut", "chocolate", "dark", "cake", "muffin", "blueberry", "pancake",
+    "sausage", "bacon", "ham", "turkey", "wrap", "burrito", "pizza", "margherita", "pepperoni",
+    "curry", "tikka", "masala", "noodle", "ramen", "sushi", "salad", "caesar", "dressing", "olive",
+]
+MISSPELLED = ["chiken breast", "brocoli", "yogurt greek", "pepperonni pizza", "samlon",
+              "porrige", "strawbery", "omlette", "spinnach", "choclate cake"]
+
+
+def make_foods(count, rng):
+    foods = set()
+    while len(foods) < count:
+        words = rng.sample(WORDS, rng.randint(1, 4))
+        name = " ".join(words).capitalize()
+        if rng.random() < 0.3:
+            name += f" {rng.randint(1, 500)}g"
+        foods.add(name)
+    return [(name, rng.randint(10, 900)) for name in sorted(foods)]
+
+
+def time_calls(func, args_list):
+    timings = []
+    for args in args_list:
+        start = time.perf_counter()
+        func(*args)
+        timings.append((time.perf_counter() - start) * 1e6)
+    return timings
+
+
+def report(label, timings):
+    timings = sorted(timings)
+    p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+    print(f"{label:<22} median {statistics.median(timings):8.1f} us   "
+          f"p99 {p99:8.1f} us   max {timings[-1]:8.1f} us")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--foods", type=int, default=10000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    foods = make_foods(args.foods, rng)
+
+    start = time.perf_counter()
+    index = FoodIndex(foods)
+    print(f"Built index over {len(index)} foods in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    prefixes = [(rng.choice(foods)[0][:rng.randint(1, 6)], 20) for _ in range(args.queries)]
+    report("prefix search", time_calls(index.search, prefixes))
+
+    fuzzy = [(rng.choice(MISSPELLED), 20) for _ in range(args.queries)]
+    report("fuzzy search", time_calls(index.fuzzy_search, fuzzy))
+    for query in MISSPELLED[:3]:
+        best = index.fuzzy_search(query, 3)
+        print(f"  {query!r} -> {[(name, round(score, 2)) for name, _, score in best]}")
+
+    renames = [([(f"{name} v2", calories)], [name]) for name, calories in rng.sample(foods, args.queries)]
+    report("incremental rename", time_calls(index.update, renames))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,35 +1,18 @@
 """Database configuration for Flask-Migrate."""
-import os
 from flask_sqlalchemy import SQLAlchemy
-from dotenv import load_dotenv
+from sqlalchemy.pool import NullPool
+from db_orm import DATABASE_URL
 
-load_dotenv()
 
 db = SQLAlchemy()
 
 def init_db(app):
     """Initialize database with Flask app."""
-    DATABASE_URL = os.environ.get('DATABASE_URL')
-    
-    if not DATABASE_URL:
-        # Use SQLite for local development if no DATABASE_URL
-        DATABASE_URL = 'sqlite:///calorie_tracker.db'
-    elif DATABASE_URL.startswith("postgres://"):
-        # Convert postgres:// to postgresql:// for SQLAlchemy
-        DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
-    
+    # Requests go through db_orm's pooled engine (DB_POOL_* env vars). This
+    # engine only serves migrations, so it keeps no idle connections.
     app.config['SQLALCHEMY_DATABASE_URI'] = DATABASE_URL
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-    
-    # Connection pool settings for production
-    if DATABASE_URL.startswith('postgresql'):
-        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
-            'pool_size': 5,
-            'max_overflow': 5,
-            'pool_timeout': 30,
-            'pool_recycle': 3600,
-            'pool_pre_ping': True
-        }
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {'poolclass': NullPool}
     
     db.init_app(app)
-    return db
\ No newline at end of file
+    return db
@@ -1,50 +1,309 @@
 from db_orm import get_session
-from models import Profile, WeeklyLog
+from models import Profile, WeeklyLog, FoodItem, WeightEntry, DailyCalorieTarget, DailyTotal, ChangeLog
+from profile_cache import ProfileCache, UuidCache
+from food_index import FoodIndex, FoodIndexCache
+from food_catalog import get_catalog
+from metrics import metrics
+from flask import g, has_request_context
+from sqlalchemy import select, union_all, func, case, cast, insert, update, and_, or_, Text
+from sqlalchemy.dialects import postgresql, sqlite
+import bisect
+import datetime
 import json
+import logging
+import os
+import time
+import uuid
 
 # ORM-based database functions
 
+MEAL_TYPES = ("breakfast", "lunch", "dinner", "snack")
+
+# Decoded Profile.data documents shared across requests in this worker,
+# validated against Profile.version on every read.
+_profile_cache = ProfileCache(
+    max_entries=int(os.environ.get("PROFILE_CACHE_MAX_ENTRIES", 256)),
+    max_bytes=int(os.environ.get("PROFILE_CACHE_MAX_BYTES", 32 * 1024 * 1024)),
+)
+
+# Attempts patch_profile makes when the generic (non-JSON-function) path loses a race
+PATCH_RETRIES = 3
+
+class ProfileConflictError(Exception):
+    """Raised when a profile changed since the version the caller read."""
+
+    def __init__(self, profile_name, expected_version, current_version):
+        super().__init__(f"Profile {profile_name} is at version {current_version}, expected {expected_version}")
+        self.profile_name = profile_name
+        self.expected_version = expected_version
+        self.current_version = current_version
+
+# Prefix and trigram food-name indexes for /api/food_search, validated against Profile.food_db_generation
+_food_indexes = FoodIndexCache(max_entries=int(os.environ.get("FOOD_INDEX_CACHE_MAX_ENTRIES", 128)))
+
+# Login-path cache of Profile.uuid -> profile_name
+_uuid_cache = UuidCache(max_entries=int(os.environ.get("PROFILE_UUID_CACHE_MAX_ENTRIES", 1024)))
+
+def _upsert(session, model, values, index_elements, update_fields):
+    """Insert a row or update `update_fields` when `index_elements` already exist.
+
+    Uses native ON CONFLICT on PostgreSQL and SQLite so the write is a single
+    statement; other dialects fall back to a select followed by insert/update.
+    """
+    _upsert_many(session, model, [values], index_elements, update_fields)
+
+def _upsert_many(session, model, rows, index_elements, update_fields):
+    """_upsert for several rows in one multi-VALUES statement where supported."""
+    if not rows:
+        return
+    dialect = session.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        stmt = insert(model).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=index_elements,
+            set_={field: stmt.excluded[field] for field in update_fields}
+        )
+        session.execute(stmt)
+        return
+    for values in rows:
+        row = session.query(model).filter_by(**{key: values[key] for key in index_elements}).first()
+        if row:
+            for field in update_fields:
+                setattr(row, field, values[field])
+        else:
+            session.add(model(**values))
+
+def _record_changes(session, profile_name, entity, keys, op="upsert"):
+    """Record that `keys` of `entity` changed, for /api/sync.
+
+    Runs in the caller's session so the change commits with the write. Each
+    key keeps a single row, re-issued with a new, higher id by one upsert
+    statement, so concurrent writers cannot race between removing the old row
+    and inserting the new one.
+
+    The profile row is locked first and stays locked until the caller
+    commits, so a profile's change ids are handed out in commit order and
+    get_changes never sees a lower id commit after a higher one. SQLite
+    ignores the lock but only ever has one writer.
+    """
+    keys = list(dict.fromkeys(str(key) for key in keys))
+    if not keys:
+        return
+    session.query(Profile.profile_name).filter_by(profile_name=profile_name).with_for_update().first()
+    now = datetime.datetime.utcnow()
+    rows = [{
+        "profile_name": profile_name,
+        "entity": entity,
+        "entity_key": key,
+        "op": op,
+        "created_at": now,
+    } for key in keys]
+    dialect = session.get_bind().dialect.name
+    if dialect == "postgresql":
+        stmt = postgresql.insert(ChangeLog).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["profile_name", "entity", "entity_key"],
+            set_={
+                "id": func.nextval(func.pg_get_serial_sequence(ChangeLog.__tablename__, "id")),
+                "op": stmt.excluded.op,
+                "created_at": stmt.excluded.created_at,
+            }
+        )
+        session.execute(stmt)
+        return
+    if dialect == "sqlite":
+        # REPLACE swaps the old row for a new one, which takes the next AUTOINCREMENT id
+        session.execute(sqlite.insert(ChangeLog).values(rows).prefix_with("OR REPLACE"))
+        return
+    session.query(ChangeLog).filter(
+        ChangeLog.profile_name == profile_name,
+        ChangeLog.entity == entity,
+        ChangeLog.entity_key.in_(keys)
+    ).delete(synchronize_session=False)
+    session.execute(insert(ChangeLog), rows)
+
+def _bump_food_generation(session, profile_name):
+    """Mark the profile's food database as changed and return its new generation."""
+    session.query(Profile).filter_by(profile_name=profile_name).update(
+        {Profile.food_db_generation: Profile.food_db_generation + 1}, synchronize_session=False
+    )
+    return session.query(Profile.food_db_generation).filter_by(profile_name=profile_name).scalar()
+
+def get_food_index(profile_name):
+    """Return the profile's FoodIndex, rebuilding it only after a food database write."""
+    with get_session() as session:
+        generation = session.query(Profile.food_db_generation).filter_by(profile_name=profile_name).scalar()
+        index = _food_indexes.get(profile_name, generation)
+        if index is None:
+            index = FoodIndex(session.query(FoodItem.name, FoodItem.calories_per_unit).filter_by(
+                profile_name=profile_name
+            ).all())
+            _food_indexes.put(profile_name, generation, index)
+    return index
+
+def search_foods(profile_name, prefix, limit=10, fuzzy=False):
+    """Return up to `limit` {"name", "calories"} whose name starts with `prefix` (case-insensitive).
+
+    The profile's own foods come first, then global catalog foods it does not
+    override under any capitalization. With `fuzzy`, remaining slots are filled with the closest trigram
+    matches among the profile's foods, so "brocoli" still finds "Broccoli".
+    """
+    index = get_food_index(profile_name)
+    matches = index.search(prefix, limit)
+    if len(matches) < limit:
+        matches += [(name, calories) for name, calories in get_catalog().search(prefix, limit)
+                    if not index.contains_casefolded(name)][:limit - len(matches)]
+    if fuzzy and len(matches) < limit:
+        found = {name for name, _ in matches}
+        matches += [(name, calories) for name, calories, _ in index.fuzzy_search(prefix, limit)
+                    if name not in found][:limit - len(matches)]
+    return [{"name": name, "calories": calories} for name, calories in matches]
+
 def get_food_calories(profile_name, food_name):
-    profile = get_profile_data(profile_name)
-    food_db = profile.get("food_database", {})
-    return food_db.get(food_name)
+    """Calories per unit from the profile's own food database, falling back to the global catalog."""
+    with get_session() as session:
+        calories = session.query(FoodItem.calories_per_unit).filter_by(
+            profile_name=profile_name, name=food_name
+        ).scalar()
+    return calories if calories is not None else get_catalog().get(food_name)
 
 def set_food_calories(profile_name, food_name, calories):
-    # Only update in profile JSON (per-profile food db)
-    profile = get_profile_data(profile_name)
-    food_db = profile.get("food_database", {})
-    food_db[food_name] = calories
-    profile["food_database"] = food_db
-    save_profile(profile_name, profile)
+    # Single-row upsert into the per-profile food table
+    with get_session() as session:
+        _upsert(session, FoodItem, {
+            "profile_name": profile_name,
+            "name": food_name,
+            "calories_per_unit": int(calories),
+            "updated_at": datetime.datetime.utcnow(),
+        }, ["profile_name", "name"], ["calories_per_unit", "updated_at"])
+        _record_changes(session, profile_name, "food", [food_name])
+        generation = _bump_food_generation(session, profile_name)
+    _food_indexes.apply(profile_name, generation, upserts=[(food_name, int(calories))])
 
 def get_profiles():
     with get_session() as session:
         profiles = session.query(Profile).all()
-        return {p.profile_name: json.loads(p.data) for p in profiles}
+        result = {p.profile_name: json.loads(p.data) for p in profiles}
+    cache = _request_profile_cache()
+    if cache is not None:
+        cache.update(result)
+    return result
 
 def save_profile(profile_name, profile_data):
-    import logging
+    cache = _request_profile_cache()
     try:
         with get_session() as session:
             profile = session.query(Profile).filter_by(profile_name=profile_name).first()
             if profile:
                 profile.data = json.dumps(profile_data)
+                profile.version = Profile.version + 1
             else:
-                profile = Profile(profile_name=profile_name, data=json.dumps(profile_data))
+                # Profile.uuid is the indexed login key; keep the document's copy in sync
+                profile_data.setdefault("uuid", str(uuid.uuid4()))
+                profile = Profile(profile_name=profile_name, uuid=profile_data["uuid"],
+                                  data=json.dumps(profile_data))
                 session.add(profile)
+            _record_changes(session, profile_name, "profile", [profile_name])
             session.commit()
     except Exception as e:
         logging.error(f"Failed to save profile {profile_name}: {e}")
+        if cache is not None:
+            cache.pop(profile_name, None)
         raise  # Re-raise to let caller handle
+    finally:
+        _profile_cache.invalidate(profile_name)
+    if cache is not None:
+        cache[profile_name] = profile_data
+
+def get_profile_name_by_uuid(profile_uuid):
+    """Resolve a login uuid to its profile name via the unique Profile.uuid index."""
+    if not profile_uuid:
+        return None
+    profile_name = _uuid_cache.get(profile_uuid)
+    if profile_name is not None:
+        return profile_name
+    with get_session() as session:
+        profile_name = session.query(Profile.profile_name).filter_by(uuid=profile_uuid).scalar()
+    if profile_name is not None:
+        _uuid_cache.put(profile_uuid, profile_name)
+    return profile_name
+
+def get_profile_uuid(profile_name):
+    with get_session() as session:
+        return session.query(Profile.uuid).filter_by(profile_name=profile_name).scalar()
+
+def _json_patch_expression(dialect, changes):
+    """SQL expression applying `changes` to Profile.data in the database, or None if unsupported."""
+    document = func.coalesce(Profile.data, "{}")
+    if dialect == "sqlite":
+        args = []
+        for key, value in changes.items():
+            args += [f'$."{key}"', func.json(json.dumps(value))]
+        return func.json_set(document, *args)
+    if dialect == "postgresql":
+        patched = cast(document, postgresql.JSONB)
+        for key, value in changes.items():
+            patched = func.jsonb_set(patched, postgresql.array([key]), cast(json.dumps(value), postgresql.JSONB), True)
+        return cast(patched, Text)
+    return None
+
+def patch_profile(profile_name, changes, expected_version=None):
+    """Set top-level fields of the profile document in one transaction.
+
+    On SQLite and PostgreSQL the fields are written with json_set/jsonb_set
+    in a single UPDATE, so concurrent patches to other fields are never lost.
+    With `expected_version` the UPDATE only applies if nobody saved since
+    that version, otherwise ProfileConflictError is raised. Other dialects
+    merge in Python under a version check and retry on conflict.
+    Returns the new version.
+    """
+    new_version = None
+    try:
+        for _ in range(PATCH_RETRIES):
+            with get_session() as session:
+                query = session.query(Profile).filter(Profile.profile_name == profile_name)
+                guard = expected_version
+                new_data = _json_patch_expression(session.get_bind().dialect.name, changes)
+                if new_data is None:
+                    row = session.query(Profile.version, Profile.data).filter_by(profile_name=profile_name).first()
+                    if row is not None:
+                        data = json.loads(row.data or "{}")
+                        data.update(changes)
+                        new_data = json.dumps(data)
+                        guard = row.version if guard is None else guard
+                if guard is not None:
+                    query = query.filter(Profile.version == guard)
+                updated = new_data is not None and query.update(
+                    {Profile.data: new_data, Profile.version: Profile.version + 1},
+                    synchronize_session=False
+                )
+                current = session.query(Profile.version).filter_by(profile_name=profile_name).scalar()
+                if current is None:
+                    raise ValueError(f"Profile {profile_name} not found")
+                if updated:
+                    _record_changes(session, profile_name, "profile", [profile_name])
+                    new_version = current
+                    break
+                if expected_version is not None:
+                    raise ProfileConflictError(profile_name, expected_version, current)
+        else:
+            raise ProfileConflictError(profile_name, guard, current)
+    finally:
+        _profile_cache.invalidate(profile_name)
+        cache = _request_profile_cache()
+        if cache is not None:
+            cache.pop(profile_name, None)
+    return new_version
 
 def get_daily_log(profile_name, today):
-    profile = get_profile_data(profile_name)
-    if "weekly_log" not in profile:
-        profile["weekly_log"] = {}
-    if today not in profile["weekly_log"]:
-        profile["weekly_log"][today] = {"breakfast": [], "lunch": [], "dinner": [], "snack": []}
-        save_profile(profile_name, profile)
-    return profile["weekly_log"][today]
+    """Return {meal_type: [entry, ...]} for one day from the weekly_log table."""
+    with get_session() as session:
+        logs = session.query(WeeklyLog).filter(
+            WeeklyLog.profile_name == profile_name,
+            WeeklyLog.date == today
+        ).order_by(WeeklyLog.id).all()
+        return _group_log_entries(logs).get(today, {meal: [] for meal in MEAL_TYPES})
 
 def add_food_to_log(profile_name, today, meal_type, food_id, food_name, calories, quantity):
     """Add food to ORM table only for single source of truth."""
@@ -58,6 +317,12 @@ def add_food_to_log(profile_name, today, meal_type, food_id, food_name, calories
             if not profile:
                 raise ValueError(f"Profile {profile_name} not found")
             
+            # Calories that are not per-unit x quantity were entered by hand and
+            # must survive synchronize_weekly_log
+            per_unit = session.query(FoodItem.calories_per_unit).filter_by(
+                profile_name=profile_name, name=food_name
+            ).scalar()
+            
             # Add to ORM table only
             entry = WeeklyLog(
                 profile_name=profile_name,
@@ -66,9 +331,12 @@ def add_food_to_log(profile_name, today, meal_type, food_id, food_name, calories
                 food_id=food_id,
                 food_name=food_name, 
                 calories=calories,
-                quantity=quantity
+                quantity=quantity,
+                manual_calories=per_unit is not None and int(calories) != per_unit * int(quantity)
             )
             session.add(entry)
+            _refresh_daily_total(session, profile_name, today)
+            _record_changes(session, profile_name, "entry", [food_id])
             session.commit()
             
             logging.info(f"Added food {food_name} to {profile_name}'s log for {today}")
@@ -77,6 +345,75 @@ def add_food_to_log(profile_name, today, meal_type, food_id, food_name, calories
         logging.error(f"Failed to add food to log: {e}")
         raise
 
+def add_food_entries(profile_name, entries):
+    """Log many validated entries in one transaction.
+
+    Each entry is a dict with date, meal_type, food_id, food_name, calories
+    and quantity. The food database is upserted once per distinct name, the
+    log rows go in with a single bulk INSERT and every touched day's
+    DailyTotal is refreshed before the commit. Entries whose calories are
+    not the stored per-unit value times quantity are marked manual, so
+    synchronize_weekly_log keeps them as logged. Entries whose food_id is
+    already logged are skipped, so a retried batch is harmless.
+    Returns one status per entry: "created", "duplicate" (already logged
+    for this profile, or repeated in the batch) or "conflict" (food_id
+    belongs to another profile).
+    """
+    results = []
+    seen = set()
+    with get_session() as session:
+        if not session.get(Profile, profile_name):
+            raise ValueError(f"Profile {profile_name} not found")
+        food_ids = [entry["food_id"] for entry in entries]
+        existing = dict(session.query(WeeklyLog.food_id, WeeklyLog.profile_name).filter(
+            WeeklyLog.food_id.in_(food_ids)
+        )) if food_ids else {}
+        now = datetime.datetime.utcnow()
+        foods = {}
+        rows = []
+        for entry in entries:
+            food_id = entry["food_id"]
+            if food_id in existing or food_id in seen:
+                results.append("duplicate" if existing.get(food_id, profile_name) == profile_name else "conflict")
+                continue
+            seen.add(food_id)
+            results.append("created")
+            foods[entry["food_name"]] = {
+                "profile_name": profile_name,
+                "name": entry["food_name"],
+                "calories_per_unit": int(round(entry["calories"] / entry["quantity"])),
+                "updated_at": now,
+            }
+            rows.append({
+                "profile_name": profile_name,
+                "date": entry["date"],
+                "meal_type": entry["meal_type"],
+                "food_id": food_id,
+                "food_name": entry["food_name"],
+                "calories": entry["calories"],
+                "quantity": entry["quantity"],
+                "created_at": now,
+            })
+        for row in rows:
+            # The last entry for a name sets its per-unit calories
+            row["manual_calories"] = row["calories"] != foods[row["food_name"]]["calories_per_unit"] * row["quantity"]
+        if rows:
+            _upsert_many(session, FoodItem, list(foods.values()), ["profile_name", "name"],
+                         ["calories_per_unit", "updated_at"])
+            session.execute(insert(WeeklyLog), rows)
+            for date in sorted({row["date"] for row in rows}):
+                _refresh_daily_total(session, profile_name, date)
+            _record_changes(session, profile_name, "food", foods)
+            generation = _bump_food_generation(session, profile_name)
+            _record_changes(session, profile_name, "entry", [row["food_id"] for row in rows])
+        session.commit()
+    if rows:
+        _food_indexes.apply(profile_name, generation, upserts=[
+            (name, food["calories_per_unit"]) for name, food in foods.items()
+        ])
+    logging.info(f"Added {len(rows)} of {len(entries)} batched entries to {profile_name}'s log")
+    return results
+
 def delete_food_from_log(profile_name, today, meal_type, food_id):
     """Delete food from ORM table only for single source of truth."""
     try:
@@ -93,6 +430,8 @@ def delete_food_from_log(profile_name, today, meal_type, food_id):
                 logging.warning(f"No entry found to delete: {food_id}")
                 return False
                 
+            _refresh_daily_total(session, profile_name, today)
+            _record_changes(session, profile_name, "entry", [food_id], op="delete")
             session.commit()
             logging.info(f"Deleted food {food_id} from {profile_name}'s log")
             return True
@@ -101,314 +440,850 @@ def delete_food_from_log(profile_name, today, meal_type, food_id):
         raise
 
 def update_food_entry(profile_name, today, meal_type, food_id, new_name, new_calories, new_quantity):
-    profile = get_profile_data(profile_name)
-    food_db = profile.get("food_database", {})
-    log = profile.get("weekly_log", {})
     # Determine if calories is a manual override
-    per_unit = None
-    if new_name in food_db:
-        per_unit = food_db[new_name]
+    per_unit = get_food_calories(profile_name, new_name)
     manual_override = False
     try:
         if per_unit is not None and int(new_calories) != int(per_unit) * int(new_quantity):
             manual_override = True
     except Exception:
         manual_override = True
-    if today in log and meal_type in log[today] and isinstance(log[today][meal_type], list):
-        for f in log[today][meal_type]:
-            if isinstance(f, dict) and f.get("id") == food_id:
-                f["name"] = new_name
-                f["quantity"] = new_quantity
-                # If not manual override, recalculate calories
-                if not manual_override and per_unit is not None:
-                    f["calories"] = int(per_unit) * int(new_quantity)
-                    f["manual_calories"] = False
-                else:
-                    f["calories"] = int(new_calories)
-                    f["manual_calories"] = True
-    save_profile(profile_name, profile)
-    # Update in ORM table
-    with get_session() as session:
-        entry = session.query(WeeklyLog).filter_by(date=today, meal_type=meal_type, food_id=food_id).first()
+    with get_session() as session:
+        entry = session.query(WeeklyLog).filter_by(
+            profile_name=profile_name, date=today, meal_type=meal_type, food_id=food_id
+        ).first()
         if entry:
             entry.food_name = new_name
             entry.quantity = new_quantity
+            # If not manual override, recalculate calories
             if not manual_override and per_unit is not None:
                 entry.calories = int(per_unit) * int(new_quantity)
+                entry.manual_calories = False
             else:
                 entry.calories = int(new_calories)
+                entry.manual_calories = True
+            _refresh_daily_total(session, profile_name, today)
+            _record_changes(session, profile_name, "entry", [food_id])
             session.commit()
 
 def update_food_entry_calories(profile_name, today, meal_type, food_id, new_calories):
-    # Update in ORM table
     with get_session() as session:
-        entry = session.query(WeeklyLog).filter_by(date=today, meal_type=meal_type, food_id=food_id).first()
+        entry = session.query(WeeklyLog).filter_by(
+            profile_name=profile_name, date=today, meal_type=meal_type, food_id=food_id
+        ).first()
         if entry:
             entry.calories = new_calories
+            # A hand-entered total must survive synchronize_weekly_log
+            entry.manual_calories = True
+            _refresh_daily_total(session, profile_name, today)
+            _record_changes(session, profile_name, "entry", [food_id])
             session.commit()
-    # Update in profile JSON
-    profile = get_profile_data(profile_name)
-    log = profile.get("weekly_log", {})
-    if today in log and meal_type in log[today]:
-        for f in log[today][meal_type]:
-            if f.get("id") == food_id:
-                f["calories"] = new_calories
-        save_profile(profile_name, profile)
+
+def _refresh_daily_total(session, profile_name, date):
+    """Recompute one day's DailyTotal row from its weekly_log entries.
+
+    Runs inside the caller's session so the total commits (or rolls back)
+    together with the log change. Days with no entries lose their row.
+    """
+    session.flush()
+    rows = session.query(
+        WeeklyLog.meal_type, func.sum(WeeklyLog.calories), func.count(WeeklyLog.id)
+    ).filter(
+        WeeklyLog.profile_name == profile_name,
+        WeeklyLog.date == date
+    ).group_by(WeeklyLog.meal_type).all()
+    if not rows:
+        session.query(DailyTotal).filter_by(profile_name=profile_name, date=date).delete()
+        return
+    values = {"profile_name": profile_name, "date": date, "total_calories": 0, "entry_count": 0}
+    values.update({f"{meal}_calories": 0 for meal in MEAL_TYPES})
+    for meal_type, calories, count in rows:
+        if meal_type in MEAL_TYPES:
+            values[f"{meal_type}_calories"] = int(calories or 0)
+        values["total_calories"] += int(calories or 0)
+        values["entry_count"] += count
+    _upsert(session, DailyTotal, values, ["profile_name", "date"],
+            [key for key in values if key not in ("profile_name", "date")])
+
+def rebuild_daily_totals(profile_name=None):
+    """Recompute daily_totals from weekly_log for one profile or all of them.
+
+    Returns the number of daily rows written.
+    """
+    with get_session() as session:
+        return _rebuild_daily_totals(session, profile_name)
+
+def _rebuild_daily_totals(session, profile_name=None, dates=None):
+    """Set-based DailyTotal rebuild, optionally limited to some of a profile's dates."""
+    columns = [
+        WeeklyLog.profile_name,
+        WeeklyLog.date,
+        func.sum(WeeklyLog.calories),
+        *[func.sum(case((WeeklyLog.meal_type == meal, WeeklyLog.calories), else_=0)) for meal in MEAL_TYPES],
+        func.count(WeeklyLog.id),
+    ]
+    source = select(*columns).group_by(WeeklyLog.profile_name, WeeklyLog.date)
+    delete_query = session.query(DailyTotal)
+    if profile_name:
+        source = source.where(WeeklyLog.profile_name == profile_name)
+        delete_query = delete_query.filter(DailyTotal.profile_name == profile_name)
+    if dates is not None:
+        source = source.where(WeeklyLog.date.in_(dates))
+        delete_query = delete_query.filter(DailyTotal.date.in_(dates))
+    delete_query.delete(synchronize_session=False)
+    result = session.execute(insert(DailyTotal).from_select(
+        ["profile_name", "date", "total_calories",
+         *[f"{meal}_calories" for meal in MEAL_TYPES], "entry_count"],
+        source
+    ))
+    return result.rowcount
 
 def edit_food_in_database(profile_name, food_name, new_name, new_calories):
-    # Update in profile JSON
-    profile = get_profile_data(profile_name)
-    food_db = profile.get("food_database", {})
-    if food_name in food_db:
-        food_db.pop(food_name)
-        food_db[new_name] = new_calories
-        save_profile(profile_name, profile)
-    # Update all references in weekly_log
-    weekly_log = profile.get("weekly_log", {})
-    for date, meals in weekly_log.items():
-        for meal, foods in meals.items():
-            if not isinstance(foods, list):
-                continue
-            for food in foods:
-                if isinstance(food, dict) and food.get("name") == food_name:
-                    food["name"] = new_name
-                    food["calories"] = new_calories * food.get("quantity", 1)
-    save_profile(profile_name, profile)
+    """Rename and/or re-price a food, carrying the change to every logged entry of it.
+
+    Logged entries are rewritten by one bulk UPDATE on the (profile_name,
+    food_name) index, keeping hand-entered calories, in the same transaction
+    as the food row, the affected days' DailyTotals and the change log.
+    """
+    new_calories = int(new_calories)
+    generation = None
+    with get_session() as session:
+        food = session.query(FoodItem).filter_by(profile_name=profile_name, name=food_name).first()
+        if food:
+            if new_name != food_name:
+                # Renaming onto an existing name replaces that entry
+                session.query(FoodItem).filter_by(profile_name=profile_name, name=new_name).delete()
+            food.name = new_name
+            food.calories_per_unit = new_calories
+            food.updated_at = datetime.datetime.utcnow()
+            entries = _logged_entries(session, profile_name, food_name)
+            if entries:
+                session.query(WeeklyLog).filter_by(profile_name=profile_name, food_name=food_name).update({
+                    WeeklyLog.food_name: new_name,
+                    WeeklyLog.calories: case((WeeklyLog.manual_calories, WeeklyLog.calories),
+                                             else_=WeeklyLog.quantity * new_calories),
+                }, synchronize_session=False)
+                _rebuild_daily_totals(session, profile_name, sorted({date for _, date in entries}))
+                _record_changes(session, profile_name, "entry", [food_id for food_id, _ in entries])
+            if new_name != food_name:
+                _record_changes(session, profile_name, "food", [food_name], op="delete")
+            _record_changes(session, profile_name, "food", [new_name])
+            generation = _bump_food_generation(session, profile_name)
+    if generation is not None:
+        _food_indexes.apply(profile_name, generation, upserts=[(new_name, new_calories)],
+                            removals=[food_name] if new_name != food_name else ())
 
 def delete_food_from_database(profile_name, food_name):
-    # Remove from profile JSON
-    profile = get_profile_data(profile_name)
-    food_db = profile.get("food_database", {})
-    if food_name in food_db:
-        food_db.pop(food_name)
-        profile["food_database"] = food_db
-        save_profile(profile_name, profile)
-    # Remove from all weekly_log entries
-    weekly_log = profile.get("weekly_log", {})
-    for date, meals in weekly_log.items():
-        for meal, foods in meals.items():
-            if not isinstance(foods, list):
-                continue
-            meals[meal] = [f for f in foods if isinstance(f, dict) and f.get("name") != food_name]
-    save_profile(profile_name, profile)
+    """Delete a food and every logged entry of it with one bulk DELETE, in one transaction."""
+    generation = None
+    with get_session() as session:
+        if session.query(FoodItem).filter_by(profile_name=profile_name, name=food_name).delete():
+            entries = _logged_entries(session, profile_name, food_name)
+            if entries:
+                session.query(WeeklyLog).filter_by(profile_name=profile_name, food_name=food_name).delete(
+                    synchronize_session=False
+                )
+                _rebuild_daily_totals(session, profile_name, sorted({date for _, date in entries}))
+                _record_changes(session, profile_name, "entry", [food_id for food_id, _ in entries], op="delete")
+            _record_changes(session, profile_name, "food", [food_name], op="delete")
+            generation = _bump_food_generation(session, profile_name)
+    if generation is not None:
+        _food_indexes.apply(profile_name, generation, removals=[food_name])
+
+def _logged_entries(session, profile_name, food_name):
+    """(food_id, date) of every log entry of one food, read through idx_weekly_log_profile_food."""
+    return session.query(WeeklyLog.food_id, WeeklyLog.date).filter_by(
+        profile_name=profile_name, food_name=food_name
+    ).all()
+
+def _request_profile_cache():
+    """Return this request's profile_name -> decoded document map, or None outside a request.
+
+    A page render calls several helpers that each need the profile document, so
+    within one request every profile is loaded and decoded at most once.
+    """
+    if not has_request_context():
+        return None
+    cache = g.get("_profile_documents")
+    if cache is None:
+        cache = g._profile_documents = {}
+    return cache
 
 def get_profile_data(profile_name):
+    """Return the decoded profile document.
+
+    The result may be shared with other callers and requests; never modify
+    it, write fields with patch_profile() instead.
+    """
+    cache = _request_profile_cache()
+    if cache is not None and profile_name in cache:
+        return cache[profile_name]
     with get_session() as session:
-        profile = session.query(Profile).filter_by(profile_name=profile_name).first()
-        if profile:
-            data = json.loads(profile.data)
+        data = None
+        if _profile_cache.peek_version(profile_name) is not None:
+            # Cheap primary-key lookup of the version before reusing the cached copy
+            version = session.query(Profile.version).filter_by(profile_name=profile_name).scalar()
+            data = _profile_cache.get(profile_name, version)
+        else:
+            _profile_cache.record_miss()
+        if data is None:
+            row = session.query(Profile.version, Profile.data).filter_by(profile_name=profile_name).first()
+            if row:
+                decode_start = time.perf_counter()
+                data = json.loads(row.data)
+                metrics.observe_json_decode(time.perf_counter() - decode_start)
+                _profile_cache.put(profile_name, row.version, data, len(row.data))
+        if data is not None:
+            if cache is not None:
+                cache[profile_name] = data
             return data
         # Return a default profile structure if not found
         return {
-            "food_database": {},
             "weight_goal": None,
-            "weights": {},
             "uuid": str(profile_name)
         }
 
+def get_profile_data_version(profile_name):
+    """Return (Profile.version, latest change_log id) for the profile, or None if it does not exist.
+
+    Every write bumps one of the two, so the pair is a cheap validator for
+    responses built from the profile's data.
+    """
+    latest_change = select(func.max(ChangeLog.id)).where(
+        ChangeLog.profile_name == profile_name
+    ).scalar_subquery()
+    with get_session() as session:
+        row = session.query(Profile.version, latest_change).filter(
+            Profile.profile_name == profile_name
+        ).first()
+    if row is None:
+        return None
+    return row[0], row[1] or 0
+
+def get_profile_cache_stats():
+    """Return hit/miss/eviction counters of the cross-request profile cache."""
+    return _profile_cache.stats()
+
+def get_cache_stats():
+    """Return stats of every in-process cache, keyed by cache name."""
+    return {
+        "profile": _profile_cache.stats(),
+        "profile_uuid": _uuid_cache.stats(),
+        "food_index": _food_indexes.stats(),
+    }
+
 def initialize_daily_log(profile_name, today):
     # Daily logs are now handled entirely by WeeklyLog ORM table
     # This function is kept for backward compatibility but does nothing
     pass
 
-def get_weekly_log(profile_name):
-    """Get weekly log from ORM tables instead of JSON for better data integrity."""
+def _group_log_entries(logs):
+    """Group WeeklyLog rows into {date: {meal_type: [entry, ...]}}."""
+    weekly_log = {}
+    for log in logs:
+        if log.date not in weekly_log:
+            weekly_log[log.date] = {meal: [] for meal in MEAL_TYPES}
+        weekly_log[log.date].setdefault(log.meal_type, []).append({
+            "id": log.food_id,
+            "name": log.food_name,
+            "calories": log.calories,
+            "quantity": log.quantity
+        })
+    return weekly_log
+
+def _log_window_query(session, profile_name, start_date=None, end_date=None):
+    query = session.query(WeeklyLog).filter(WeeklyLog.profile_name == profile_name)
+    if start_date:
+        query = query.filter(WeeklyLog.date >= start_date)
+    if end_date:
+        query = query.filter(WeeklyLog.date <= end_date)
+    return query
+
+def get_weekly_log(profile_name, start_date=None, end_date=None):
+    """Get {date: meals} from the weekly_log table, optionally limited to a date window."""
     with get_session() as session:
-        # Query from WeeklyLog table
-        logs = session.query(WeeklyLog).filter(
-            WeeklyLog.profile_name == profile_name
-        ).order_by(WeeklyLog.date.desc()).all()
-        
-        # Convert to expected format
-        weekly_log = {}
-        for log in logs:
-            if log.date not in weekly_log:
-                weekly_log[log.date] = {
-                    "breakfast": [], "lunch": [], 
-                    "dinner": [], "snack": []
-                }
-            
-            weekly_log[log.date][log.meal_type].append({
-                "id": log.food_id,
-                "name": log.food_name,
-                "calories": log.calories,
-                "quantity": log.quantity
-            })
-        
-        return weekly_log
+        logs = _log_window_query(session, profile_name, start_date, end_date).order_by(
+            WeeklyLog.date.desc(), WeeklyLog.id
+        ).all()
+        return _group_log_entries(logs)
+
+def get_weekly_log_page(profile_name, after=None, limit=500, start_date=None, end_date=None):
+    """Return up to `limit` entries ordered by (date, id) after the `after` cursor.
+
+    Keyset pagination: each page is an index seek past the previous page's
+    last (date, id), so deep pages cost the same as the first one.
+    Returns (entries, next_cursor); next_cursor is None on the last page.
+    """
+    with get_session() as session:
+        query = _log_window_query(session, profile_name, start_date, end_date)
+        if after:
+            after_date, after_id = after
+            query = query.filter(or_(
+                WeeklyLog.date > after_date,
+                and_(WeeklyLog.date == after_date, WeeklyLog.id > after_id)
+            ))
+        logs = query.order_by(WeeklyLog.date, WeeklyLog.id).limit(limit).all()
+        entries = [{
+            "date": log.date,
+            "meal_type": log.meal_type,
+            "id": log.food_id,
+            "name": log.food_name,
+            "calories": log.calories,
+            "quantity": log.quantity
+        } for log in logs]
+        next_cursor = (logs[-1].date, logs[-1].id) if len(logs) == limit else None
+        return entries, next_cursor
+
+def iter_weekly_log(profile_name, start_date=None, end_date=None, batch_size=500):
+    """Yield every entry in (date, id) order, fetching one keyset page at a time."""
+    cursor = None
+    while True:
+        entries, cursor = get_weekly_log_page(profile_name, cursor, batch_size, start_date, end_date)
+        yield from entries
+        if cursor is None:
+            return
 
 def get_food_database(profile_name):
-    profile = get_profile_data(profile_name)
-    return profile.get("food_database", {})
+    with get_session() as session:
+        rows = session.query(FoodItem.name, FoodItem.calories_per_unit).filter_by(
+            profile_name=profile_name
+        ).order_by(FoodItem.name).all()
+        return {name: calories for name, calories in rows}
 
 def set_daily_calories(profile_name, today, daily_calories):
-    profile = get_profile_data(profile_name)
-    if "daily_calories" not in profile:
-        profile["daily_calories"] = {}
-    profile["daily_calories"][today] = daily_calories
-    save_profile(profile_name, profile)
+    """Set the calorie target in force from `today` until the next target."""
+    with get_session() as session:
+        _upsert(session, DailyCalorieTarget, {
+            "profile_name": profile_name,
+            "effective_date": today,
+            "calories": int(daily_calories),
+        }, ["profile_name", "effective_date"], ["calories"])
+        _record_changes(session, profile_name, "target", [today])
 
 def get_daily_calories(profile_name, today):
-    profile = get_profile_data(profile_name)
-    return profile.get("daily_calories", {}).get(today)
+    """Return the calorie target in force on `today`, or None if none was ever set."""
+    with get_session() as session:
+        return session.query(DailyCalorieTarget.calories).filter(
+            DailyCalorieTarget.profile_name == profile_name,
+            DailyCalorieTarget.effective_date <= today
+        ).order_by(DailyCalorieTarget.effective_date.desc()).limit(1).scalar()
+
+def get_daily_calories_for_dates(profile_name, dates):
+    """Resolve the target in force for each date with a single query.
+
+    Fetches the target in force on the earliest date plus every target that
+    starts inside the range, then bisects per date.
+    """
+    if not dates:
+        return {}
+    first, last = min(dates), max(dates)
+    target = DailyCalorieTarget
+    in_force = select(target.effective_date, target.calories).where(
+        target.profile_name == profile_name,
+        target.effective_date <= first
+    ).order_by(target.effective_date.desc()).limit(1).subquery()
+    within = select(target.effective_date, target.calories).where(
+        target.profile_name == profile_name,
+        target.effective_date > first,
+        target.effective_date <= last
+    )
+    with get_session() as session:
+        rows = sorted(session.execute(union_all(
+            select(in_force.c.effective_date, in_force.c.calories), within
+        )).all())
+    effective_dates = [row[0] for row in rows]
+    resolved = {}
+    for date in dates:
+        index = bisect.bisect_right(effective_dates, date) - 1
+        resolved[date] = rows[index][1] if index >= 0 else None
+    return resolved
+
+def get_daily_calorie_targets(profile_name):
+    """Return every {effective_date: calories} target in date order."""
+    with get_session() as session:
+        rows = session.query(DailyCalorieTarget.effective_date, DailyCalorieTarget.calories).filter_by(
+            profile_name=profile_name
+        ).order_by(DailyCalorieTarget.effective_date)
+        return {date: calories for date, calories in rows}
 
 def set_weight_goal(profile_name, weight_goal):
-    profile = get_profile_data(profile_name)
-    profile["weight_goal"] = weight_goal
-    save_profile(profile_name, profile)
+    patch_profile(profile_name, {"weight_goal": weight_goal})
 
 def get_weight_goal(profile_name):
     profile = get_profile_data(profile_name)
     return profile.get("weight_goal")
 
 def get_current_weight(profile_name, today):
-    profile = get_profile_data(profile_name)
-    return profile.get("weights", {}).get(today)
+    with get_session() as session:
+        return session.query(WeightEntry.weight).filter_by(
+            profile_name=profile_name, date=today
+        ).scalar()
 
 def get_previous_weight(profile_name, today):
-    profile = get_profile_data(profile_name)
-    weights = profile.get("weights", {})
-    dates = sorted(weights.keys())
-    prev = None
-    for d in dates:
-        if d < today:
-            prev = weights[d]
-        else:
-            break
-    return prev
+    """Most recent weight logged before `today`."""
+    with get_session() as session:
+        return session.query(WeightEntry.weight).filter(
+            WeightEntry.profile_name == profile_name,
+            WeightEntry.date < today
+        ).order_by(WeightEntry.date.desc()).limit(1).scalar()
 
 def log_weight(profile_name, today, weight):
-    profile = get_profile_data(profile_name)
-    if "weights" not in profile:
-        profile["weights"] = {}
-    profile["weights"][today] = weight
-    save_profile(profile_name, profile)
+    with get_session() as session:
+        _upsert(session, WeightEntry, {
+            "profile_name": profile_name,
+            "date": today,
+            "weight": float(weight),
+        }, ["profile_name", "date"], ["weight"])
+        _record_changes(session, profile_name, "weight", [today])
 
 def delete_profile(profile_name):
     with get_session() as session:
+        # Bulk deletes skip ORM cascades, so remove child rows explicitly
+        session.query(FoodItem).filter_by(profile_name=profile_name).delete()
+        session.query(WeightEntry).filter_by(profile_name=profile_name).delete()
+        session.query(DailyCalorieTarget).filter_by(profile_name=profile_name).delete()
+        session.query(DailyTotal).filter_by(profile_name=profile_name).delete()
+        session.query(WeeklyLog).filter_by(profile_name=profile_name).delete()
+        session.query(ChangeLog).filter_by(profile_name=profile_name).delete()
         session.query(Profile).filter_by(profile_name=profile_name).delete()
         session.commit()
+    _profile_cache.invalidate(profile_name)
+    _uuid_cache.invalidate_profile(profile_name)
+    _food_indexes.invalidate(profile_name)
+    cache = _request_profile_cache()
+    if cache is not None:
+        cache.pop(profile_name, None)
 
 def get_meal_calories(profile_name, today):
-    log = get_daily_log(profile_name, today)
-    return {meal: sum(f["calories"] for f in foods) if isinstance(foods, list) else 0 for meal, foods in log.items()}
+    """Return {meal_type: calories} for one day via SUM ... GROUP BY meal_type."""
+    meal_calories = {meal: 0 for meal in MEAL_TYPES}
+    with get_session() as session:
+        rows = session.query(WeeklyLog.meal_type, func.sum(WeeklyLog.calories)).filter(
+            WeeklyLog.profile_name == profile_name,
+            WeeklyLog.date == today
+        ).group_by(WeeklyLog.meal_type)
+        for meal_type, calories in rows:
+            meal_calories[meal_type] = int(calories or 0)
+    return meal_calories
 
-def get_weekly_data(profile_name):
-    profile = get_profile_data(profile_name)
-    weekly_log = profile.get("weekly_log", {})
-    data = []
-    for date, meals in weekly_log.items():
-        total = 0
-        if isinstance(meals, dict):
-            for foods in meals.values():
-                if isinstance(foods, list):
-                    total += sum(f.get("calories", 0) for f in foods if isinstance(f, dict))
-        data.append({"date": date, "total_calories": total})
-    return sorted(data, key=lambda x: x["date"])
+def get_weekly_data(profile_name, start_date=None, end_date=None):
+    """Daily calorie totals in date order, read from the daily_totals table."""
+    with get_session() as session:
+        query = session.query(DailyTotal.date, DailyTotal.total_calories).filter(
+            DailyTotal.profile_name == profile_name
+        )
+        if start_date:
+            query = query.filter(DailyTotal.date >= start_date)
+        if end_date:
+            query = query.filter(DailyTotal.date <= end_date)
+        return [{"date": date, "total_calories": total} for date, total in query.order_by(DailyTotal.date)]
 
 def get_food_counts(profile_name):
-    profile = get_profile_data(profile_name)
-    weekly_log = profile.get("weekly_log", {})
-    counts = {}
-    for meals in weekly_log.values():
-        for foods in meals.values():
-            if not isinstance(foods, list):
-                continue
-            for f in foods:
-                if isinstance(f, dict) and "name" in f:
-                    counts[f["name"]] = counts.get(f["name"], 0) + 1
-    return counts
+    """Return {food_name: times logged} via COUNT ... GROUP BY food_name."""
+    with get_session() as session:
+        rows = session.query(WeeklyLog.food_name, func.count(WeeklyLog.id)).filter(
+            WeeklyLog.profile_name == profile_name
+        ).group_by(WeeklyLog.food_name)
+        return {name: count for name, count in rows}
 
 def get_weight_change(profile_name):
-    profile = get_profile_data(profile_name)
-    weights = profile.get("weights", {})
-    if not weights:
-        return None
-    dates = sorted(weights.keys())
-    if len(dates) < 2:
-        return None
-    return weights[dates[-1]] - weights[dates[0]]
+    """Difference between the latest and the earliest logged weight."""
+    with get_session() as session:
+        query = session.query(WeightEntry.date, WeightEntry.weight).filter_by(profile_name=profile_name)
+        first = query.order_by(WeightEntry.date.asc()).first()
+        last = query.order_by(WeightEntry.date.desc()).first()
+        if first is None or first.date == last.date:
+            return None
+        return last.weight - first.weight
 
-def get_history(profile_name, start_date=None, end_date=None, page=1, per_page=None):
-    """Get history with optional pagination to improve performance."""
-    profile = get_profile_data(profile_name)
-    weekly_log = profile.get("weekly_log", {})
-    
-    # Filter dates first
-    filtered_dates = []
-    for date in weekly_log.keys():
-        if (not start_date or date >= start_date) and (not end_date or date <= end_date):
-            filtered_dates.append(date)
-    
-    # Sort dates in reverse chronological order
-    filtered_dates.sort(reverse=True)
-    
-    # Apply pagination if requested
-    if per_page:
-        start_idx = (page - 1) * per_page
-        end_idx = start_idx + per_page
-        paginated_dates = filtered_dates[start_idx:end_idx]
-    else:
-        paginated_dates = filtered_dates
+def get_history(profile_name, start_date=None, end_date=None, page=1, per_page=None, before=None):
+    """Get one page of history, newest day first.
+
+    The page of dates is chosen in SQL from daily_totals (one row per logged
+    day), either by page number (LIMIT/OFFSET) or, when `before` is given,
+    by keyset on date so deep pages cost the same as the first. Returns
+    (history, total_days) where total_days counts every day in the range.
+    """
+    with get_session() as session:
+        query = session.query(DailyTotal.date, DailyTotal.total_calories).filter(
+            DailyTotal.profile_name == profile_name
+        )
+        if start_date:
+            query = query.filter(DailyTotal.date >= start_date)
+        if end_date:
+            query = query.filter(DailyTotal.date <= end_date)
+        # daily_totals is unique per (profile, date), so this counts distinct dates
+        total_days = query.with_entities(func.count(DailyTotal.id)).scalar()
+        
+        page_query = query.order_by(DailyTotal.date.desc())
+        if before:
+            page_query = page_query.filter(DailyTotal.date < before)
+        elif per_page:
+            page_query = page_query.offset((max(page, 1) - 1) * per_page)
+        if per_page:
+            page_query = page_query.limit(per_page)
+        paginated = page_query.all()
+        
+        # Load entries only for the dates on this page
+        paginated_dates = [date for date, _ in paginated]
+        logs = session.query(WeeklyLog).filter(
+            WeeklyLog.profile_name == profile_name,
+            WeeklyLog.date.in_(paginated_dates)
+        ).order_by(WeeklyLog.date.desc(), WeeklyLog.id).all() if paginated_dates else []
+        meals_by_date = _group_log_entries(logs)
     
-    # Build history only for paginated dates
+    targets = get_daily_calories_for_dates(profile_name, paginated_dates)
     history = {}
-    for date in paginated_dates:
-        meals = weekly_log[date]
-        total = 0
-        safe_meals = {}
-        for meal, foods in meals.items():
-            if isinstance(foods, list):
-                safe_meals[meal] = foods
-                total += sum(f.get("calories", 0) for f in foods if isinstance(f, dict))
-            else:
-                safe_meals[meal] = []
-        daily_calories = profile.get("daily_calories", {}).get(date, 2000)
-        over_limit = total > daily_calories
+    for date, total in paginated:
+        daily_calories = targets.get(date) or 2000
         history[date] = {
-            "meals": safe_meals,
+            "meals": meals_by_date.get(date, {meal: [] for meal in MEAL_TYPES}),
             "total_calories": total,
             "daily_calories": daily_calories,
-            "over_limit": over_limit
+            "over_limit": total > daily_calories
         }
     
-    return history, len(filtered_dates)
+    return history, total_days
 
-def synchronize_weekly_log(profile_name, today):
-    profile = get_profile_data(profile_name)
-    food_db = profile.get("food_database", {})
-    weekly_log = profile.get("weekly_log", {})
-    today_log = weekly_log.get(today, {})
-    changed = False
-    for meal, foods in today_log.items():
-        if not isinstance(foods, list):
+def get_changes(profile_name, since=0, limit=500):
+    """Return rows changed after the `since` cursor, oldest change first.
+
+    Upserts carry the row's current values and deletes carry only the key,
+    so the payload is proportional to what changed. Returns
+    {"cursor", "has_more", "changes": {entity: {"upserted", "deleted"}}};
+    pass the returned cursor as `since` on the next call. The cursor is safe
+    to resume from because _record_changes serializes each profile's writers.
+    """
+    with get_session() as session:
+        rows = session.query(ChangeLog.id, ChangeLog.entity, ChangeLog.entity_key, ChangeLog.op).filter(
+            ChangeLog.profile_name == profile_name,
+            ChangeLog.id > since
+        ).order_by(ChangeLog.id).limit(limit + 1).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        keys = {}
+        for _, entity, key, op in rows:
+            keys.setdefault(entity, {}).setdefault(op, []).append(key)
+
+        def upserted_keys(entity):
+            return keys.get(entity, {}).get("upsert", [])
+
+        upserted = {"entry": [], "food": {}, "weight": {}, "target": {}, "profile": None}
+        if upserted_keys("entry"):
+            logs = session.query(WeeklyLog).filter(
+                WeeklyLog.profile_name == profile_name,
+                WeeklyLog.food_id.in_(upserted_keys("entry"))
+            )
+            upserted["entry"] = [{
+                "date": log.date,
+                "meal_type": log.meal_type,
+                "id": log.food_id,
+                "name": log.food_name,
+                "calories": log.calories,
+                "quantity": log.quantity
+            } for log in logs]
+        if upserted_keys("food"):
+            upserted["food"] = dict(session.query(FoodItem.name, FoodItem.calories_per_unit).filter(
+                FoodItem.profile_name == profile_name, FoodItem.name.in_(upserted_keys("food"))
+            ).all())
+        if upserted_keys("weight"):
+            upserted["weight"] = dict(session.query(WeightEntry.date, WeightEntry.weight).filter(
+                WeightEntry.profile_name == profile_name, WeightEntry.date.in_(upserted_keys("weight"))
+            ).all())
+        if upserted_keys("target"):
+            upserted["target"] = dict(session.query(DailyCalorieTarget.effective_date, DailyCalorieTarget.calories).filter(
+                DailyCalorieTarget.profile_name == profile_name,
+                DailyCalorieTarget.effective_date.in_(upserted_keys("target"))
+            ).all())
+        if upserted_keys("profile"):
+            raw = session.query(Profile.data).filter_by(profile_name=profile_name).scalar()
+            upserted["profile"] = json.loads(raw) if raw else None
+
+    changes = {}
+    for entity in ("entry", "food", "weight", "target"):
+        found = {entry["id"] for entry in upserted["entry"]} if entity == "entry" else set(upserted[entity])
+        # A key whose row vanished since the change was recorded is reported as deleted
+        deleted = keys.get(entity, {}).get("delete", []) + [
+            key for key in upserted_keys(entity) if key not in found
+        ]
+        changes[entity] = {"upserted": upserted[entity], "deleted": deleted}
+    if upserted["profile"] is not None:
+        changes["profile"] = upserted["profile"]
+    return {
+        "cursor": rows[-1].id if rows else since,
+        "has_more": has_more,
+        "changes": changes
+    }
+
+def _parse_import_record(record):
+    """Validate one import record and return it normalized, or raise ValueError."""
+    kind = record.get("type") or "entry"
+    if kind == "profile":
+        return None  # Imports target an existing profile; its settings are left alone
+    if kind not in ("entry", "food", "weight", "target"):
+        raise ValueError(f"unknown record type {kind!r}")
+    name = str(record.get("name") or "").strip()
+    if kind == "food":
+        if not name:
+            raise ValueError("food name is required")
+        return {"type": kind, "name": name, "calories": int(record["calories"])}
+    date = str(record.get("date") or "")
+    datetime.datetime.strptime(date, "%Y-%m-%d")
+    if kind == "weight":
+        return {"type": kind, "date": date, "weight": float(record["weight"])}
+    if kind == "target":
+        return {"type": kind, "date": date, "calories": int(record["calories"])}
+    if record.get("meal_type") not in MEAL_TYPES:
+        raise ValueError(f"invalid meal type {record.get('meal_type')!r}")
+    if not name:
+        raise ValueError("food name is required")
+    calories = int(record["calories"])
+    quantity = int(record.get("quantity") or 1)
+    if calories < 0 or quantity < 1:
+        raise ValueError("calories must be >= 0 and quantity >= 1")
+    manual = record.get("manual_calories")
+    if isinstance(manual, str):
+        manual = manual.strip().lower() in ("1", "true", "yes")
+    return {
+        "type": kind,
+        "date": date,
+        "meal_type": record["meal_type"],
+        "food_id": str(record.get("food_id") or uuid.uuid4()),
+        "name": name,
+        "calories": calories,
+        "quantity": quantity,
+        "manual_calories": bool(manual),
+    }
+
+def _import_chunk(session, profile_name, records, stats):
+    entries = {}
+    foods = {}
+    implied_foods = {}
+    weights = {}
+    targets = {}
+    for record in records:
+        if record["type"] == "entry":
+            entries[record["food_id"]] = record
+        elif record["type"] == "food":
+            foods[record["name"]] = record["calories"]
+        elif record["type"] == "weight":
+            weights[record["date"]] = record["weight"]
+        else:
+            targets[record["date"]] = record["calories"]
+    now = datetime.datetime.utcnow()
+
+    # food_id is globally unique: update this profile's rows, skip other profiles'
+    existing = {}
+    if entries:
+        existing = {row.food_id: row for row in session.query(
+            WeeklyLog.id, WeeklyLog.food_id, WeeklyLog.profile_name, WeeklyLog.date
+        ).filter(WeeklyLog.food_id.in_(list(entries)))}
+    inserts, updates, dates = [], [], set()
+    for food_id, record in entries.items():
+        values = {
+            "date": record["date"],
+            "meal_type": record["meal_type"],
+            "food_name": record["name"],
+            "calories": record["calories"],
+            "quantity": record["quantity"],
+            "manual_calories": record["manual_calories"],
+        }
+        row = existing.get(food_id)
+        if row is None:
+            inserts.append(dict(values, profile_name=profile_name, food_id=food_id, created_at=now))
+        elif row.profile_name == profile_name:
+            updates.append(dict(values, id=row.id))
+            dates.add(row.date)
+        else:
+            stats["conflicts"] += 1
             continue
-        for entry in foods:
-            if entry.get("manual_calories"):
-                continue  # skip manual override
-            if entry["name"] in food_db:
-                per_unit = food_db[entry["name"]]
-                quantity = entry.get("quantity", 1)
-                new_calories = per_unit * quantity
-                if entry.get("calories") != new_calories:
-                    entry["calories"] = new_calories
-                    changed = True
-    if changed:
-        save_profile(profile_name, profile)
+        dates.add(record["date"])
+        implied_foods.setdefault(record["name"], int(round(record["calories"] / record["quantity"])))
+    if inserts:
+        session.execute(insert(WeeklyLog), inserts)
+    if updates:
+        session.execute(update(WeeklyLog), updates)
+    stats["entries_inserted"] += len(inserts)
+    stats["entries_updated"] += len(updates)
+
+    # Foods named only by imported entries are added without overriding existing calories
+    known = set()
+    if implied_foods or foods:
+        known = {name for (name,) in session.query(FoodItem.name).filter(
+            FoodItem.profile_name == profile_name, FoodItem.name.in_(set(implied_foods) | set(foods))
+        )}
+    food_values = {name: calories for name, calories in implied_foods.items() if name not in known}
+    food_values.update(foods)
+    food_rows = [{"profile_name": profile_name, "name": name, "calories_per_unit": calories, "updated_at": now}
+                 for name, calories in food_values.items()]
+    _upsert_many(session, FoodItem, food_rows, ["profile_name", "name"], ["calories_per_unit", "updated_at"])
+    _upsert_many(session, WeightEntry, [
+        {"profile_name": profile_name, "date": date, "weight": weight, "created_at": now}
+        for date, weight in weights.items()
+    ], ["profile_name", "date"], ["weight"])
+    _upsert_many(session, DailyCalorieTarget, [
+        {"profile_name": profile_name, "effective_date": date, "calories": calories, "created_at": now}
+        for date, calories in targets.items()
+    ], ["profile_name", "effective_date"], ["calories"])
+    stats["foods"] += len(set(food_values) - known)
+    stats["weights"] += len(weights)
+    stats["targets"] += len(targets)
+
+    if dates:
+        _rebuild_daily_totals(session, profile_name, sorted(dates))
+    _record_changes(session, profile_name, "entry", [row["food_id"] for row in inserts] +
+                    [food_id for food_id, row in existing.items() if row.profile_name == profile_name])
+    _record_changes(session, profile_name, "food", [row["name"] for row in food_rows])
+    if food_rows:
+        _bump_food_generation(session, profile_name)
+    _record_changes(session, profile_name, "weight", weights)
+    _record_changes(session, profile_name, "target", targets)
+
+def import_records(profile_name, records, chunk_size=5000, max_errors=20):
+    """Validate and bulk-load export-format records into one profile.
+
+    Records are processed in chunks of `chunk_size`, each in its own
+    transaction: entries are inserted (or, when their food_id is already
+    logged for this profile, updated) in bulk, so re-importing the same file
+    is idempotent. Foods, weights and targets are upserted and the touched
+    days' DailyTotal rows rebuilt. Returns counts, the first `max_errors`
+    validation errors and the throughput.
+    """
+    started = time.perf_counter()
+    stats = {"rows": 0, "invalid": 0, "entries_inserted": 0, "entries_updated": 0,
+             "conflicts": 0, "foods": 0, "weights": 0, "targets": 0, "errors": []}
+    if not validate_profile(profile_name):
+        raise ValueError(f"Profile {profile_name} not found")
+    chunk = []
+
+    def flush():
+        with get_session() as session:
+            _import_chunk(session, profile_name, chunk, stats)
+        chunk.clear()
+
+    for line_number, record in enumerate(records, start=1):
+        stats["rows"] += 1
+        try:
+            if isinstance(record, Exception):
+                raise record
+            parsed = _parse_import_record(record)
+        except (KeyError, TypeError, ValueError) as e:
+            stats["invalid"] += 1
+            if len(stats["errors"]) < max_errors:
+                stats["errors"].append({"record": line_number, "error": str(e) or type(e).__name__})
+            continue
+        if parsed is not None:
+            chunk.append(parsed)
+        if len(chunk) >= chunk_size:
+            flush()
+    if chunk:
+        flush()
+    stats["seconds"] = round(time.perf_counter() - started, 3)
+    stats["rows_per_second"] = int(stats["rows"] / stats["seconds"]) if stats["seconds"] else stats["rows"]
+    logging.info(f"Imported {stats['rows']} records into {profile_name} in {stats['seconds']}s")
+    return stats
+
+def iter_export_records(profile_name=None, batch_size=1000):
+    """Yield every profile, food, weight, target and log entry as a flat dict.
+
+    Each table is read with yield_per, which streams from a server-side
+    cursor on PostgreSQL, so memory stays flat however much is exported.
+    Pass profile_name to export a single profile.
+    """
+    def stream(session, *columns, order_by):
+        query = select(*columns).order_by(*order_by).execution_options(yield_per=batch_size)
+        if profile_name:
+            query = query.where(columns[0] == profile_name)
+        return session.execute(query)
+
+    with get_session() as session:
+        for name, profile_uuid, raw in stream(session, Profile.profile_name, Profile.uuid, Profile.data,
+                                              order_by=[Profile.profile_name]):
+            yield {"type": "profile", "profile": name, "uuid": profile_uuid,
+                   "data": json.loads(raw) if raw else {}}
+        for name, food, calories in stream(session, FoodItem.profile_name, FoodItem.name,
+                                           FoodItem.calories_per_unit,
+                                           order_by=[FoodItem.profile_name, FoodItem.name]):
+            yield {"type": "food", "profile": name, "name": food, "calories": calories}
+        for name, date, weight in stream(session, WeightEntry.profile_name, WeightEntry.date, WeightEntry.weight,
+                                         order_by=[WeightEntry.profile_name, WeightEntry.date]):
+            yield {"type": "weight", "profile": name, "date": date, "weight": weight}
+        for name, date, calories in stream(session, DailyCalorieTarget.profile_name,
+                                           DailyCalorieTarget.effective_date, DailyCalorieTarget.calories,
+                                           order_by=[DailyCalorieTarget.profile_name, DailyCalorieTarget.effective_date]):
+            yield {"type": "target", "profile": name, "date": date, "calories": calories}
+        for row in stream(session, WeeklyLog.profile_name, WeeklyLog.date, WeeklyLog.meal_type, WeeklyLog.food_id,
+                          WeeklyLog.food_name, WeeklyLog.calories, WeeklyLog.quantity, WeeklyLog.manual_calories,
+                          order_by=[WeeklyLog.profile_name, WeeklyLog.date, WeeklyLog.id]):
+            yield {"type": "entry", "profile": row[0], "date": row[1], "meal_type": row[2], "food_id": row[3],
+                   "name": row[4], "calories": row[5], "quantity": row[6], "manual_calories": bool(row[7])}
+
+def synchronize_weekly_log(profile_name, today, start=None):
+    """Recompute logged calories from current per-unit food calories, keeping manual overrides.
+
+    Covers `today`, or every day from `start` through `today` when given.
+    Without `start` this is one indexed read unless the food database changed
+    since the last sync (food_db_generation vs food_synced_generation). Stale
+    entries are rewritten by one UPDATE against food_items. Returns the number
+    of entries updated.
+    """
+    with get_session() as session:
+        generations = session.query(Profile.food_db_generation, Profile.food_synced_generation).filter_by(
+            profile_name=profile_name
+        ).first()
+        if generations is None:
+            return 0
+        generation, synced = generations
+        if start is None and generation == synced:
+            return 0
+        per_unit = select(FoodItem.calories_per_unit).where(
+            FoodItem.profile_name == WeeklyLog.profile_name,
+            FoodItem.name == WeeklyLog.food_name
+        ).scalar_subquery()
+        stale = and_(
+            WeeklyLog.profile_name == profile_name,
+            WeeklyLog.date.between(start or today, today),
+            WeeklyLog.manual_calories.is_(False),
+            WeeklyLog.calories != per_unit * WeeklyLog.quantity,
+        )
+        entries = session.query(WeeklyLog.food_id, WeeklyLog.date).filter(stale).all()
+        if entries:
+            session.query(WeeklyLog).filter(stale).update(
+                {WeeklyLog.calories: per_unit * WeeklyLog.quantity}, synchronize_session=False
+            )
+            _rebuild_daily_totals(session, profile_name, sorted({date for _, date in entries}))
+            _record_changes(session, profile_name, "entry", [food_id for food_id, _ in entries])
+        # A write that bumped the generation meanwhile leaves the profile dirty
+        session.query(Profile).filter(
+            Profile.profile_name == profile_name,
+            Profile.food_synced_generation < generation
+        ).update({Profile.food_synced_generation: generation}, synchronize_session=False)
+    if entries:
+        logging.info(f"Synchronized {len(entries)} logged entries for {profile_name} with the food database")
+    return len(entries)
 
 def calculate_total_calories(profile_name, today):
-    log = get_daily_log(profile_name, today)
-    return sum(f["calories"] for foods in log.values() for f in foods if isinstance(foods, list))
+    with get_session() as session:
+        total = session.query(func.sum(WeeklyLog.calories)).filter(
+            WeeklyLog.profile_name == profile_name,
+            WeeklyLog.date == today
+        ).scalar()
+        return int(total or 0)
 
-def get_weights(profile_name):
-    profile = get_profile_data(profile_name)
-    return profile.get("weights", {})
+def get_weights(profile_name, start_date=None, end_date=None):
+    """Return {date: weight} in date order, optionally limited to a date window."""
+    with get_session() as session:
+        query = session.query(WeightEntry.date, WeightEntry.weight).filter(
+            WeightEntry.profile_name == profile_name
+        )
+        if start_date:
+            query = query.filter(WeightEntry.date >= start_date)
+        if end_date:
+            query = query.filter(WeightEntry.date <= end_date)
+        return {date: weight for date, weight in query.order_by(WeightEntry.date)}
 
 def validate_profile(profile_name):
-    profiles = get_profiles()
-    return profile_name in profiles
+    # Primary-key lookup; no profile documents are loaded
+    with get_session() as session:
+        return session.query(Profile.profile_name).filter_by(profile_name=profile_name).first() is not None
 
-def get_profiles_file_path():
-    """Return the path to the profiles.json file for backup/export"""
-    import os
-    return os.path.join(os.path.dirname(__file__), 'profiles_export.json')
@@ -1,8 +1,12 @@
 """Database session management for ORM operations."""
 import os
+import threading
+import time
 from contextlib import contextmanager
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -14,25 +18,123 @@ if not DATABASE_URL:
 elif DATABASE_URL.startswith("postgres://"):
     DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
 
-# Create engine with connection pooling
+# Pin a relative SQLite path to the working directory, the file this module has
+# always opened; Flask-SQLAlchemy would otherwise resolve it under instance/.
+_url = make_url(DATABASE_URL)
+if (_url.get_backend_name() == "sqlite" and _url.database not in (None, "", ":memory:")
+        and not _url.query.get("uri") and not os.path.isabs(_url.database)):
+    DATABASE_URL = _url.set(database=os.path.abspath(_url.database)).render_as_string(hide_password=False)
+
+# Pool sizing per process (each gunicorn worker gets its own pool)
+POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))
+MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 5))
+POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 30))
+POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 3600))
+
+
+# The one connection pool per process (migrations use an unpooled engine, see database.py)
 engine = create_engine(
     DATABASE_URL,
-    pool_size=5,
-    max_overflow=5,
-    pool_timeout=30,
-    pool_recycle=3600,
+    poolclass=QueuePool,
+    pool_size=POOL_SIZE,
+    max_overflow=MAX_OVERFLOW,
+    pool_timeout=POOL_TIMEOUT,
+    pool_recycle=POOL_RECYCLE,
     pool_pre_ping=True
 )
 
+# Checkout counts, how long get_session waited for a connection and how long
+# connections stay checked out, for get_pool_stats()
+_stats_lock = threading.Lock()
+_pool_stats = {"checkouts": 0, "checkins": 0, "timeouts": 0, "waits": 0,
+               "wait_seconds_total": 0.0, "wait_seconds_max": 0.0,
+               "hold_seconds_total": 0.0, "hold_seconds_max": 0.0}
+
+
+@event.listens_for(engine, "connect")
+def _remember_pid(dbapi_connection, connection_record):
+    connection_record.info["pid"] = os.getpid()
+
+
+@event.listens_for(engine, "checkout")
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    # A connection opened before a fork (gunicorn's preloading master) must not be
+    # shared with the child; discarding it makes the pool open a fresh one here.
+    pid = os.getpid()
+    if connection_record.info["pid"] != pid:
+        connection_record.dbapi_connection = connection_proxy.dbapi_connection = None
+        raise exc.DisconnectionError(
+            f"Connection record belongs to pid {connection_record.info['pid']}, checked out in pid {pid}"
+        )
+    connection_record.info["checked_out_at"] = time.perf_counter()
+    with _stats_lock:
+        _pool_stats["checkouts"] += 1
+
+
+@event.listens_for(engine, "checkin")
+def _on_checkin(dbapi_connection, connection_record):
+    started = connection_record.info.pop("checked_out_at", None)
+    if started is None:
+        return
+    held = time.perf_counter() - started
+    with _stats_lock:
+        _pool_stats["checkins"] += 1
+        _pool_stats["hold_seconds_total"] += held
+        _pool_stats["hold_seconds_max"] = max(_pool_stats["hold_seconds_max"], held)
+
+
 SessionLocal = sessionmaker(bind=engine)
 
+def get_pool_stats():
+    """Return current pool occupancy, checkout counts and wait and hold times for this process."""
+    pool = engine.pool
+    with _stats_lock:
+        stats = dict(_pool_stats)
+    checkins = stats.pop("checkins")
+    waits = stats.pop("waits")
+    wait_max = stats.pop("wait_seconds_max")
+    hold_max = stats.pop("hold_seconds_max")
+    stats.update({
+        "pid": os.getpid(),
+        "pool_size": pool.size(),
+        "max_overflow": MAX_OVERFLOW,
+        "timeout": POOL_TIMEOUT,
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": max(pool.overflow(), 0),
+        "wait_ms_avg": round(1000 * stats["wait_seconds_total"] / waits, 3) if waits else 0.0,
+        "wait_ms_max": round(1000 * wait_max, 3),
+        "hold_ms_avg": round(1000 * stats["hold_seconds_total"] / checkins, 3) if checkins else 0.0,
+        "hold_ms_max": round(1000 * hold_max, 3),
+    })
+    return stats
+
 @contextmanager
 def get_session():
-    """Provide a transactional scope around a series of operations."""
+    """Provide a transactional scope around a series of operations.
+
+    The connection is checked out up front so the wait for a pooled
+    connection is recorded in get_pool_stats().
+    """
     session = SessionLocal()
     try:
+        started = time.perf_counter()
+        try:
+            session.connection()
+        finally:
+            waited = time.perf_counter() - started
+            with _stats_lock:
+                _pool_stats["waits"] += 1
+                _pool_stats["wait_seconds_total"] += waited
+                _pool_stats["wait_seconds_max"] = max(_pool_stats["wait_seconds_max"], waited)
         yield session
         session.commit()
+    except exc.TimeoutError:
+        # No connection freed up within DB_POOL_TIMEOUT
+        with _stats_lock:
+            _pool_stats["timeouts"] += 1
+        session.rollback()
+        raise
     except Exception:
         session.rollback()
         raise
@@ -0,0 +1,177 @@
+"""Read-only global food catalog, compiled to a sorted fixed-width file and memory-mapped.
+
+The bundled CSV (name,calories) or JSON ({name: calories}) is compiled once
+into data/food_catalog.idx. Every worker maps that file read-only, so the
+pages live in the OS page cache and are shared instead of copied per process.
+Lookups are a binary search over fixed-width records keyed on the case-folded
+name.
+
+Run `python food_catalog.py` to (re)compile the index ahead of time.
+"""
+import bisect
+import csv
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+CATALOG_SOURCE = os.environ.get("FOOD_CATALOG_PATH", os.path.join(DATA_DIR, "food_catalog.csv"))
+
+MAGIC = b"FOODCAT1"
+# magic, record count, key/name field width in bytes
+_HEADER = struct.Struct("<8sII")
+_CALORIES = struct.Struct("<I")
+
+
+def read_source(path):
+    """Return [(name, calories)] from a CSV with name,calories columns or a JSON object."""
+    with open(path, encoding="utf-8", newline="") as f:
+        if path.endswith(".json"):
+            rows = json.load(f).items()
+        else:
+            rows = ((row.get("name"), row.get("calories")) for row in csv.DictReader(f))
+        foods = []
+        for name, calories in rows:
+            name = (name or "").replace("\0", "").strip()
+            try:
+                calories = int(round(float(calories)))
+            except (TypeError, ValueError):
+                continue
+            if name and 0 <= calories < 2 ** 32:
+                foods.append((name, calories))
+    return foods
+
+
+def build_index(foods):
+    """Pack (name, calories) pairs into the sorted fixed-width index format."""
+    records = {}
+    for name, calories in foods:
+        # First spelling of a name wins
+        records.setdefault(name.casefold().encode("utf-8"), (name.encode("utf-8"), calories))
+    width = max([len(key) for key in records] + [len(name) for name, _ in records.values()] + [1])
+    parts = [_HEADER.pack(MAGIC, len(records), width)]
+    for key in sorted(records):
+        name, calories = records[key]
+        parts.append(key.ljust(width, b"\0") + name.ljust(width, b"\0") + _CALORIES.pack(calories))
+    return b"".join(parts)
+
+
+def compile_catalog(source=CATALOG_SOURCE, target=None):
+    """Compile `source` into `target` (default: alongside it with an .idx suffix); return the target."""
+    target = target or os.path.splitext(source)[0] + ".idx"
+    data = build_index(read_source(source))
+    tmp_path = f"{target}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    # Atomic swap, so concurrently starting workers never map a partial file
+    os.replace(tmp_path, target)
+    return target
+
+
+class FoodCatalog:
+    """Binary-searchable view over a compiled catalog buffer (an mmap or bytes)."""
+
+    def __init__(self, buffer):
+        magic, self._count, self._width = _HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC:
+            raise ValueError("Not a compiled food catalog")
+        self._buffer = buffer
+        self._record_size = 2 * self._width + _CALORIES.size
+        self._keys = _KeyView(self)
+
+    @classmethod
+    def open(cls, path):
+        with open(path, "rb") as f:
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    def __len__(self):
+        return self._count
+
+    def _record(self, index):
+        offset = _HEADER.size + index * self._record_size + self._width
+        name = self._buffer[offset:offset + self._width].rstrip(b"\0").decode("utf-8")
+        return name, _CALORIES.unpack_from(self._buffer, offset + self._width)[0]
+
+    def _padded_key(self, text):
+        key = text.strip().casefold().encode("utf-8")
+        return key.ljust(self._width, b"\0") if len(key) <= self._width else None
+
+    def get(self, name):
+        """Return calories for `name` (case-insensitive), or None if it is not in the catalog."""
+        key = self._padded_key(name)
+        if key is None:
+            return None
+        index = bisect.bisect_left(self._keys, key)
+        if index < self._count and self._keys[index] == key:
+            return self._record(index)[1]
+        return None
+
+    def search(self, prefix, limit=10):
+        """Return up to `limit` (name, calories) whose name starts with `prefix`, ignoring case."""
+        key = self._padded_key(prefix)
+        if key is None:
+            return []
+        raw_prefix = key.rstrip(b"\0")
+        results = []
+        index = bisect.bisect_left(self._keys, key)
+        while index < self._count and len(results) < limit and self._keys[index].startswith(raw_prefix):
+            results.append(self._record(index))
+            index += 1
+        return results
+
+
+class _KeyView:
+    """Sequence of padded record keys, so bisect can search the buffer without copying it."""
+
+    def __init__(self, catalog):
+        self._catalog = catalog
+
+    def __len__(self):
+        return self._catalog._count
+
+    def __getitem__(self, index):
+        catalog = self._catalog
+        offset = _HEADER.size + index * catalog._record_size
+        return catalog._buffer[offset:offset + catalog._width]
+
+
+EMPTY_CATALOG = FoodCatalog(build_index([]))
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+def get_catalog():
+    """Return the process-wide catalog, compiling the index first if it is missing or stale."""
+    global _catalog
+    if _catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                _catalog = _load_catalog(CATALOG_SOURCE)
+    return _catalog
+
+
+def _load_catalog(source):
+    target = os.path.splitext(source)[0] + ".idx"
+    try:
+        if not os.path.exists(target) or (
+                os.path.exists(source) and os.path.getmtime(source) > os.path.getmtime(target)):
+            if not os.path.exists(source):
+                logging.info(f"No food catalog at {source}; using per-profile foods only")
+                return EMPTY_CATALOG
+            compile_catalog(source, target)
+        catalog = FoodCatalog.open(target)
+    except (OSError, ValueError) as e:
+        logging.warning(f"Food catalog unavailable ({e}); using per-profile foods only")
+        return EMPTY_CATALOG
+    logging.info(f"Mapped food catalog {target} ({len(catalog)} foods)")
+    return catalog
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    path = compile_catalog()
+    logging.info(f"Compiled {len(FoodCatalog.open(path))} foods into {path}")
@@ -0,0 +1,248 @@
+"""Per-profile in-memory food-name indexes for prefix autocomplete and fuzzy search."""
+import bisect
+import heapq
+import re
+import threading
+from collections import OrderedDict
+
+_WORD = re.compile(r"\w+")
+
+
+def trigrams(text):
+    """pg_trgm-style trigrams: each word case-folded and padded with two leading blanks and one trailing."""
+    grams = set()
+    for word in _WORD.findall(text.casefold()):
+        word = f"  {word} "
+        grams.update(word[i:i + 3] for i in range(len(word) - 2))
+    return grams
+
+
+def _bitmask(slots):
+    """Int with the bit for each (ascending) slot number set."""
+    bits = bytearray(slots[-1] // 8 + 1)
+    for slot in slots:
+        bits[slot >> 3] |= 1 << (slot & 7)
+    return int.from_bytes(bits, "little")
+
+
+def _at_least(slices, value):
+    """Bitmask of slots whose bit-sliced counter (low bit first) is >= value."""
+    if value >> len(slices):
+        return 0
+    greater, equal = 0, -1
+    for bit in range(len(slices) - 1, -1, -1):
+        if value >> bit & 1:
+            equal &= slices[bit]
+        else:
+            greater |= equal & slices[bit]
+            equal &= ~slices[bit]
+    return greater | equal
+
+
+class FoodIndex:
+    """Sorted case-folded names for prefix search plus a trigram inverted index for fuzzy search.
+
+    Each food gets a slot number and each trigram's posting list is an int
+    bitmask of slots, so counting shared trigrams for every food is a handful
+    of big-int operations instead of a Python loop per posting. Slots are also
+    grouped by trigram count, so foods too long to reach the current cut-off
+    are skipped without being scored. The index can be updated in place; a
+    lock keeps searches from seeing a half-applied update.
+    """
+
+    def __init__(self, foods):
+        self._lock = threading.Lock()
+        self._calories = {}
+        self._slots = {}
+        self._names = []
+        self._gram_counts = []
+        self._free_slots = []
+        slots_by_gram = {}
+        slots_by_count = {}
+        for name, calories in foods:
+            if name not in self._calories:
+                slot = self._slots[name] = len(self._names)
+                grams = trigrams(name)
+                self._names.append(name)
+                self._gram_counts.append(len(grams))
+                slots_by_count.setdefault(len(grams), []).append(slot)
+                for gram in grams:
+                    slots_by_gram.setdefault(gram, []).append(slot)
+            self._calories[name] = calories
+        self._keys = sorted((name.casefold(), name) for name in self._calories)
+        self._postings = {gram: _bitmask(slots) for gram, slots in slots_by_gram.items()}
+        self._count_masks = {count: _bitmask(slots) for count, slots in slots_by_count.items()}
+
+    def __len__(self):
+        return len(self._calories)
+
+    def __contains__(self, name):
+        return name in self._calories
+
+    def contains_casefolded(self, name):
+        """Whether some food's name equals `name` ignoring case."""
+        key = name.casefold()
+        with self._lock:
+            index = bisect.bisect_left(self._keys, (key,))
+            return index < len(self._keys) and self._keys[index][0] == key
+
+    def _add(self, name, calories):
+        if name not in self._calories:
+            bisect.insort(self._keys, (name.casefold(), name))
+            grams = trigrams(name)
+            if self._free_slots:
+                slot = self._free_slots.pop()
+                self._names[slot] = name
+                self._gram_counts[slot] = len(grams)
+            else:
+                slot = len(self._names)
+                self._names.append(name)
+                self._gram_counts.append(len(grams))
+            self._slots[name] = slot
+            bit = 1 << slot
+            self._count_masks[len(grams)] = self._count_masks.get(len(grams), 0) | bit
+            for gram in grams:
+                self._postings[gram] = self._postings.get(gram, 0) | bit
+        self._calories[name] = calories
+
+    def _remove(self, name):
+        if self._calories.pop(name, None) is None:
+            return
+        self._keys.pop(bisect.bisect_left(self._keys, (name.casefold(), name)))
+        slot = self._slots.pop(name)
+        self._names[slot] = None
+        self._free_slots.append(slot)
+        clear = ~(1 << slot)
+        grams = trigrams(name)
+        for masks, key in [(self._count_masks, len(grams))] + [(self._postings, gram) for gram in grams]:
+            mask = masks[key] & clear
+            if mask:
+                masks[key] = mask
+            else:
+                del masks[key]
+
+    def update(self, upserts=(), removals=()):
+        """Apply removed names, then added or changed (name, calories) pairs; a rename is both."""
+        with self._lock:
+            for name in removals:
+                self._remove(name)
+            for name, calories in upserts:
+                self._add(name, calories)
+
+    def search(self, prefix, limit=10):
+        """Return up to `limit` (name, calories) whose name starts with `prefix`, ignoring case."""
+        prefix = prefix.casefold()
+        with self._lock:
+            start = bisect.bisect_left(self._keys, (prefix,))
+            results = []
+            for key, name in self._keys[start:start + limit]:
+                if not key.startswith(prefix):
+                    break
+                results.append((name, self._calories[name]))
+        return results
+
+    def fuzzy_search(self, query, limit=10, threshold=0.3):
+        """Return up to `limit` (name, calories, similarity) ranked by trigram similarity to `query`.
+
+        Similarity is shared trigrams over the union of both trigram sets, as in pg_trgm.
+        """
+        grams = trigrams(query)
+        size = len(grams)
+        scored = []
+        with self._lock:
+            # slices[k] holds bit k of every slot's shared-trigram count
+            slices = []
+            for gram in grams:
+                carry = self._postings.get(gram, 0)
+                for bit in range(len(slices)):
+                    if not carry:
+                        break
+                    slices[bit], carry = slices[bit] ^ carry, slices[bit] & carry
+                if carry:
+                    slices.append(carry)
+
+            # Walk share counts from highest down. A food sharing n trigrams scores
+            # at most n / size, so stop once that cannot reach the cut-off: the
+            # threshold, or the score of the current `limit`-th best match.
+            seen = 0
+            cutoff = threshold
+            for shared in range(size, 0, -1):
+                if len(scored) >= limit:
+                    cutoff = max(threshold, -heapq.nsmallest(limit, scored)[-1][0])
+                if shared / size < cutoff:
+                    break
+                reached = _at_least(slices, shared)
+                new, seen = reached & ~seen, reached
+                if not new:
+                    continue
+                # shared / (size + count - shared) >= cutoff bounds the trigram count
+                longest = int(shared * (1 + 1 / cutoff) - size + 1e-9)
+                allowed = 0
+                for count in range(shared, longest + 1):
+                    allowed |= self._count_masks.get(count, 0)
+                bits = bin(new & allowed)[:1:-1]
+                slot = bits.find("1")
+                while slot != -1:
+                    similarity = shared / (size + self._gram_counts[slot] - shared)
+                    name = self._names[slot]
+                    scored.append((-similarity, name.casefold(), name))
+                    slot = bits.find("1", slot + 1)
+            return [(name, self._calories[name], -negated)
+                    for negated, _, name in heapq.nsmallest(limit, scored)]
+
+
+class FoodIndexCache:
+    """Bounded LRU of profile_name -> (food_db_generation, FoodIndex)."""
+
+    def __init__(self, max_entries=128):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, profile_name, generation):
+        with self._lock:
+            entry = self._entries.get(profile_name)
+            if entry is None or entry[0] != generation:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(profile_name)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, profile_name, generation, index):
+        with self._lock:
+            self._entries[profile_name] = (generation, index)
+            self._entries.move_to_end(profile_name)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, profile_name):
+        with self._lock:
+            self._entries.pop(profile_name, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+    def apply(self, profile_name, generation, upserts=(), removals=()):
+        """Advance a cached index to `generation` in place; drop it if it missed an earlier write."""
+        with self._lock:
+            entry = self._entries.get(profile_name)
+            if entry is None or entry[0] >= generation:
+                return
+            if entry[0] != generation - 1:
+                del self._entries[profile_name]
+                return
+            entry[1].update(upserts, removals)
+            self._entries[profile_name] = (generation, entry[1])
@@ -0,0 +1,49 @@
+"""Gunicorn production profile (used by start_app.py and the Procfile).
+
+Every setting can be overridden from the environment, e.g.
+GUNICORN_WORKER_CLASS=sync WEB_CONCURRENCY=4 python start_app.py
+"""
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+
+# Worker model: "gthread" (threads share one process and its pool) or "sync"
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "gthread")
+if worker_class not in ("gthread", "sync"):
+    raise ValueError(f"GUNICORN_WORKER_CLASS must be 'gthread' or 'sync', not {worker_class!r}")
+workers = int(os.environ.get("WEB_CONCURRENCY", 2))
+threads = int(os.environ.get("GUNICORN_THREADS", 4)) if worker_class == "gthread" else 1
+
+# Import the app once in the master; workers share its memory copy-on-write
+preload_app = os.environ.get("GUNICORN_PRELOAD", "true").lower() == "true"
+
+# Recycle workers periodically to bound memory growth; jitter avoids restarting all at once
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", 1000))
+max_requests_jitter = int(os.environ.get("GUNICORN_MAX_REQUESTS_JITTER", 100))
+
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 30))
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", 30))
+keepalive = int(os.environ.get("GUNICORN_KEEPALIVE", 5))
+
+accesslog = "-"
+errorlog = "-"
+loglevel = os.environ.get("GUNICORN_LOG_LEVEL", "info")
+
+
+def post_fork(server, worker):
+    """Give each worker its own connection pool.
+
+    With preload_app the engine was created in the master; connections
+    inherited across fork must not be shared, so drop them without closing
+    the parent's sockets and let the worker open fresh ones. (db_orm's
+    checkout pid check backs this up for anything that slips through.)
+    """
+    from db_orm import engine
+    engine.dispose(close=False)
+    server.log.info(f"Worker {worker.pid}: database pool reset after fork")
+
+
+def when_ready(server):
+    """Compile and map the food catalog once in the master; forked workers inherit the read-only mapping."""
+    from food_catalog import get_catalog
+    server.log.info(f"Food catalog ready: {len(get_catalog())} foods")
@@ -0,0 +1,165 @@
+"""In-process request, database and cache metrics rendered in Prometheus text format.
+
+Counters live in each worker process, so every scrape of /metrics reports the
+worker that served it.
+"""
+import bisect
+import os
+import threading
+import time
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+PREFIX = "calorietracker"
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+DECODE_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.05)
+
+
+class Histogram:
+    """Cumulative-bucket histogram; callers hold the registry lock."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def samples(self, name, labels):
+        cumulative = 0
+        for bound, count in zip(self.buckets + ("+Inf",), self.counts):
+            cumulative += count
+            yield f"{name}_bucket", {**labels, "le": str(bound)}, cumulative
+        yield f"{name}_sum", labels, self.sum
+        yield f"{name}_count", labels, self.count
+
+
+class Metrics:
+    """Per-process registry of request and JSON decode metrics plus pluggable collectors.
+
+    A collector is a callable returning [(name, type, help, [(labels, value), ...])],
+    evaluated on every render; it is how cache and pool stats are exposed.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latency = {}       # (endpoint, method) -> Histogram of seconds
+        self._responses = {}     # (endpoint, method, status) -> count
+        self._sql_queries = {}   # endpoint -> Histogram of queries per request
+        self._sql_seconds = {}   # endpoint -> Histogram of SQL seconds per request
+        self._json_decode = Histogram(DECODE_BUCKETS)
+        self._collectors = []
+        self.started = time.time()
+
+    def observe_request(self, endpoint, method, status, seconds, queries, sql_seconds):
+        with self._lock:
+            key = (endpoint, method)
+            histogram = self._latency.get(key)
+            if histogram is None:
+                histogram = self._latency[key] = Histogram(LATENCY_BUCKETS)
+                self._sql_queries.setdefault(endpoint, Histogram(QUERY_COUNT_BUCKETS))
+                self._sql_seconds.setdefault(endpoint, Histogram(LATENCY_BUCKETS))
+            histogram.observe(seconds)
+            self._sql_queries[endpoint].observe(queries)
+            self._sql_seconds[endpoint].observe(sql_seconds)
+            key = (endpoint, method, status)
+            self._responses[key] = self._responses.get(key, 0) + 1
+
+    def observe_json_decode(self, seconds):
+        with self._lock:
+            self._json_decode.observe(seconds)
+
+    def add_collector(self, collector):
+        self._collectors.append(collector)
+
+    def render(self):
+        """Return every metric in Prometheus text exposition format (0.0.4)."""
+        families = []
+        with self._lock:
+            families.append(("http_request_duration_seconds", "histogram", "Request latency by endpoint.",
+                             [sample for (endpoint, method), histogram in sorted(self._latency.items())
+                              for sample in histogram.samples(f"{PREFIX}_http_request_duration_seconds",
+                                                              {"endpoint": endpoint, "method": method})]))
+            families.append(("http_responses_total", "counter", "Responses by endpoint and status code.",
+                             [(f"{PREFIX}_http_responses_total",
+                               {"endpoint": endpoint, "method": method, "status": str(status)}, count)
+                              for (endpoint, method, status), count in sorted(self._responses.items())]))
+            families.append(("db_queries_per_request", "histogram", "SQL statements executed per request.",
+                             [sample for endpoint, histogram in sorted(self._sql_queries.items())
+                              for sample in histogram.samples(f"{PREFIX}_db_queries_per_request",
+                                                              {"endpoint": endpoint})]))
+            families.append(("db_query_seconds_per_request", "histogram", "Time spent in SQL per request.",
+                             [sample for endpoint, histogram in sorted(self._sql_seconds.items())
+                              for sample in histogram.samples(f"{PREFIX}_db_query_seconds_per_request",
+                                                              {"endpoint": endpoint})]))
+            families.append(("profile_json_decode_seconds", "histogram", "Time to decode a profile document.",
+                             list(self._json_decode.samples(f"{PREFIX}_profile_json_decode_seconds", {}))))
+        families.append(("process_start_time_seconds", "gauge", "Start time of this worker since the epoch.",
+                         [(f"{PREFIX}_process_start_time_seconds", {"pid": str(os.getpid())}, self.started)]))
+        for collector in self._collectors:
+            families.extend((name, kind, help_text,
+                             [(f"{PREFIX}_{name}", labels, value) for labels, value in samples])
+                            for name, kind, help_text, samples in collector())
+
+        lines = []
+        for name, kind, help_text, samples in families:
+            lines.append(f"# HELP {PREFIX}_{name} {help_text}")
+            lines.append(f"# TYPE {PREFIX}_{name} {kind}")
+            for sample_name, labels, value in samples:
+                lines.append(f"{sample_name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value):
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
+
+
+metrics = Metrics()
+
+
+def init_app(app, engine):
+    """Time every request and count the SQL it runs, recording into `metrics`."""
+
+    @app.before_request
+    def start_request_timer():
+        g._metrics_start = time.perf_counter()
+        g._sql_queries = 0
+        g._sql_seconds = 0.0
+
+    @app.after_request
+    def record_request(response):
+        start = g.pop("_metrics_start", None)
+        if start is not None:
+            endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+            metrics.observe_request(endpoint, request.method, response.status_code,
+                                    time.perf_counter() - start, g._sql_queries, g._sql_seconds)
+        return response
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info["_metrics_query_start"] = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def record_query(conn, cursor, statement, parameters, context, executemany):
+        start = conn.info.pop("_metrics_query_start", None)
+        if start is not None and has_request_context() and "_metrics_start" in g:
+            g._sql_queries += 1
+            g._sql_seconds += time.perf_counter() - start
@@ -0,0 +1,153 @@
+"""Add daily_totals and fold legacy JSON weekly_log entries into weekly_log
+
+Revision ID: a4b7e3d9c281
+Revises: f1c6d8a2e954
+Create Date: 2026-10-18 13:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+import datetime
+import json
+import uuid
+
+
+# revision identifiers, used by Alembic.
+revision = 'a4b7e3d9c281'
+down_revision = 'f1c6d8a2e954'
+branch_labels = None
+depends_on = None
+
+
+MEAL_TYPES = ('breakfast', 'lunch', 'dinner', 'snack')
+
+profiles_table = sa.table('profiles',
+    sa.column('profile_name', sa.String),
+    sa.column('data', sa.Text),
+    sa.column('version', sa.Integer)
+)
+
+weekly_log_table = sa.table('weekly_log',
+    sa.column('profile_name', sa.String),
+    sa.column('date', sa.String),
+    sa.column('meal_type', sa.String),
+    sa.column('food_id', sa.String),
+    sa.column('food_name', sa.String),
+    sa.column('calories', sa.Integer),
+    sa.column('quantity', sa.Integer),
+    sa.column('manual_calories', sa.Boolean),
+    sa.column('created_at', sa.DateTime)
+)
+
+
+def upgrade():
+    """Add weekly_log.manual_calories and a backfilled daily_totals table."""
+    conn = op.get_bind()
+    inspector = inspect(conn)
+
+    columns = [col['name'] for col in inspector.get_columns('weekly_log')]
+    if 'manual_calories' not in columns:
+        op.add_column('weekly_log', sa.Column('manual_calories', sa.Boolean(), nullable=False,
+                                              server_default=sa.false()))
+
+    # Entries written before the weekly_log table existed only live in the
+    # profile JSON; move them so daily_totals covers the whole history. Once a
+    # day has table rows the table is authoritative for it: the JSON copy may
+    # still hold entries the user has since deleted, so that day is not folded.
+    now = datetime.datetime.utcnow()
+    days_in_table = set(conn.execute(
+        sa.select(weekly_log_table.c.profile_name, weekly_log_table.c.date).distinct()
+    ).fetchall())
+    # weekly_log.food_id is unique across all profiles: food_id -> owning profile
+    existing_ids = dict(conn.execute(
+        sa.select(weekly_log_table.c.food_id, weekly_log_table.c.profile_name)
+    ).fetchall())
+    rows = conn.execute(sa.select(profiles_table.c.profile_name, profiles_table.c.data)).fetchall()
+    for profile_name, raw in rows:
+        try:
+            data = json.loads(raw) if raw else {}
+        except ValueError:
+            continue
+        legacy_log = data.pop('weekly_log', None)
+        if legacy_log is None:
+            continue
+        entries = []
+        for date, meals in legacy_log.items():
+            if not isinstance(meals, dict) or (profile_name, date) in days_in_table:
+                continue
+            for meal_type, foods in meals.items():
+                if meal_type not in MEAL_TYPES or not isinstance(foods, list):
+                    continue
+                for food in foods:
+                    if not isinstance(food, dict) or not food.get('name'):
+                        continue
+                    try:
+                        calories = int(food.get('calories', 0))
+                        quantity = int(food.get('quantity', 1))
+                    except (TypeError, ValueError):
+                        continue
+                    food_id = food.get('id') or str(uuid.uuid4())
+                    owner = existing_ids.get(food_id)
+                    if owner == profile_name:
+                        continue  # Already in this profile's weekly_log
+                    if owner is not None:
+                        # Another profile's entry has this id; keep ours under a new one
+                        food_id = str(uuid.uuid4())
+                    existing_ids[food_id] = profile_name
+                    entries.append({
+                        'profile_name': profile_name,
+                        'date': date,
+                        'meal_type': meal_type,
+                        'food_id': food_id,
+                        'food_name': food['name'],
+                        'calories': calories,
+                        'quantity': quantity,
+                        'manual_calories': bool(food.get('manual_calories')),
+                        'created_at': now
+                    })
+        if entries:
+            op.bulk_insert(weekly_log_table, entries)
+        conn.execute(
+            profiles_table.update()
+            .where(profiles_table.c.profile_name == profile_name)
+            .values(data=json.dumps(data), version=profiles_table.c.version + 1)
+        )
+
+    if 'daily_totals' not in inspector.get_table_names():
+        op.create_table('daily_totals',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('profile_name', sa.String(), nullable=False),
+        sa.Column('date', sa.String(), nullable=False),
+        sa.Column('total_calories', sa.Integer(), nullable=False),
+        sa.Column('breakfast_calories', sa.Integer(), nullable=False),
+        sa.Column('lunch_calories', sa.Integer(), nullable=False),
+        sa.Column('dinner_calories', sa.Integer(), nullable=False),
+        sa.Column('snack_calories', sa.Integer(), nullable=False),
+        sa.Column('entry_count', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['profile_name'], ['profiles.profile_name'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+        with op.batch_alter_table('daily_totals', schema=None) as batch_op:
+            batch_op.create_index('uq_daily_totals_profile_date', ['profile_name', 'date'], unique=True)
+
+    # Backfill in one set-based statement
+    op.execute("DELETE FROM daily_totals")
+    meal_sums = ', '.join(
+        f"SUM(CASE WHEN meal_type = '{meal}' THEN calories ELSE 0 END)" for meal in MEAL_TYPES
+    )
+    op.execute(
+        "INSERT INTO daily_totals (profile_name, date, total_calories, breakfast_calories, "
+        "lunch_calories, dinner_calories, snack_calories, entry_count) "
+        f"SELECT profile_name, date, SUM(calories), {meal_sums}, COUNT(id) "
+        "FROM weekly_log GROUP BY profile_name, date"
+    )
+
+
+def downgrade():
+    # Imported legacy entries stay in weekly_log, which is the source of truth
+    with op.batch_alter_table('daily_totals', schema=None) as batch_op:
+        batch_op.drop_index('uq_daily_totals_profile_date')
+    op.drop_table('daily_totals')
+    with op.batch_alter_table('weekly_log') as batch_op:
+        batch_op.drop_column('manual_calories')
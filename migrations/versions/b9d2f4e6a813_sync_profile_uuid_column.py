@@ -0,0 +1,52 @@
+"""Sync profiles.uuid with the uuid stored in each profile document
+
+Revision ID: b9d2f4e6a813
+Revises: a4b7e3d9c281
+Create Date: 2026-10-18 15:05:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import json
+
+
+# revision identifiers, used by Alembic.
+revision = 'b9d2f4e6a813'
+down_revision = 'a4b7e3d9c281'
+branch_labels = None
+depends_on = None
+
+
+profiles_table = sa.table('profiles',
+    sa.column('profile_name', sa.String),
+    sa.column('uuid', sa.String),
+    sa.column('data', sa.Text)
+)
+
+
+def upgrade():
+    """Copy the document uuid (the one in login cookies and magic links) into the indexed column."""
+    conn = op.get_bind()
+    rows = conn.execute(sa.select(profiles_table.c.profile_name, profiles_table.c.uuid,
+                                  profiles_table.c.data)).fetchall()
+    taken = {row.uuid for row in rows}
+    for profile_name, column_uuid, raw in rows:
+        try:
+            data = json.loads(raw) if raw else {}
+        except ValueError:
+            continue
+        doc_uuid = data.get('uuid')
+        if not doc_uuid or doc_uuid == column_uuid or doc_uuid in taken:
+            continue
+        conn.execute(
+            profiles_table.update()
+            .where(profiles_table.c.profile_name == profile_name)
+            .values(uuid=doc_uuid)
+        )
+        taken.discard(column_uuid)
+        taken.add(doc_uuid)
+
+
+def downgrade():
+    # The synced column values remain valid unique uuids
+    pass
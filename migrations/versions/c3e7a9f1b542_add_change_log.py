@@ -0,0 +1,64 @@
+"""Add change_log for delta sync
+
+Revision ID: c3e7a9f1b542
+Revises: b9d2f4e6a813
+Create Date: 2026-10-18 16:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3e7a9f1b542'
+down_revision = 'b9d2f4e6a813'
+branch_labels = None
+depends_on = None
+
+
+# entity -> (source table, key column)
+SYNCED_TABLES = (
+    ('profile', 'profiles', 'profile_name'),
+    ('food', 'food_items', 'name'),
+    ('weight', 'weight_entries', 'date'),
+    ('target', 'daily_calorie_targets', 'effective_date'),
+    ('entry', 'weekly_log', 'food_id'),
+)
+
+
+def upgrade():
+    """Create change_log and seed one upsert per existing row so a sync from 0 returns everything."""
+    conn = op.get_bind()
+    inspector = inspect(conn)
+
+    if 'change_log' not in inspector.get_table_names():
+        op.create_table('change_log',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('profile_name', sa.String(), nullable=False),
+        sa.Column('entity', sa.String(), nullable=False),
+        sa.Column('entity_key', sa.String(), nullable=False),
+        sa.Column('op', sa.String(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['profile_name'], ['profiles.profile_name'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sqlite_autoincrement=True
+        )
+        with op.batch_alter_table('change_log', schema=None) as batch_op:
+            batch_op.create_index('idx_change_log_profile_id', ['profile_name', 'id'], unique=False)
+            batch_op.create_index('uq_change_log_profile_entity_key',
+                                  ['profile_name', 'entity', 'entity_key'], unique=True)
+
+    op.execute("DELETE FROM change_log")
+    for entity, table, key in SYNCED_TABLES:
+        op.execute(
+            "INSERT INTO change_log (profile_name, entity, entity_key, op, created_at) "
+            f"SELECT profile_name, '{entity}', {key}, 'upsert', CURRENT_TIMESTAMP FROM {table}"
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('change_log', schema=None) as batch_op:
+        batch_op.drop_index('uq_change_log_profile_entity_key')
+        batch_op.drop_index('idx_change_log_profile_id')
+    op.drop_table('change_log')
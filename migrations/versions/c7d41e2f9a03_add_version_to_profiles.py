@@ -0,0 +1,33 @@
+"""Add version column to profiles
+
+Revision ID: c7d41e2f9a03
+Revises: b23af7e857f9
+Create Date: 2026-10-18 09:12:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7d41e2f9a03'
+down_revision = 'b23af7e857f9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Add the monotonically increasing profile version used for cache invalidation."""
+    conn = op.get_bind()
+    inspector = inspect(conn)
+
+    columns = [col['name'] for col in inspector.get_columns('profiles')]
+    if 'version' not in columns:
+        op.add_column('profiles', sa.Column('version', sa.Integer(), nullable=False,
+                                            server_default='1'))
+
+
+def downgrade():
+    with op.batch_alter_table('profiles') as batch_op:
+        batch_op.drop_column('version')
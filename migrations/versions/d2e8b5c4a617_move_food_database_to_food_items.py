@@ -0,0 +1,109 @@
+"""Move per-profile food databases into the food_items table
+
+Revision ID: d2e8b5c4a617
+Revises: c7d41e2f9a03
+Create Date: 2026-10-18 10:05:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+import datetime
+import json
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2e8b5c4a617'
+down_revision = 'c7d41e2f9a03'
+branch_labels = None
+depends_on = None
+
+
+profiles_table = sa.table('profiles',
+    sa.column('profile_name', sa.String),
+    sa.column('data', sa.Text),
+    sa.column('version', sa.Integer)
+)
+
+food_items_table = sa.table('food_items',
+    sa.column('profile_name', sa.String),
+    sa.column('name', sa.String),
+    sa.column('calories_per_unit', sa.Integer),
+    sa.column('created_at', sa.DateTime),
+    sa.column('updated_at', sa.DateTime)
+)
+
+
+def upgrade():
+    """Create food_items and move each profile's food_database dict out of the JSON blob."""
+    conn = op.get_bind()
+    inspector = inspect(conn)
+
+    if 'food_items' not in inspector.get_table_names():
+        op.create_table('food_items',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('profile_name', sa.String(), nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('calories_per_unit', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['profile_name'], ['profiles.profile_name'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+        with op.batch_alter_table('food_items', schema=None) as batch_op:
+            batch_op.create_index('uq_food_items_profile_name', ['profile_name', 'name'], unique=True)
+
+    now = datetime.datetime.utcnow()
+    rows = conn.execute(sa.select(profiles_table.c.profile_name, profiles_table.c.data)).fetchall()
+    for profile_name, raw in rows:
+        try:
+            data = json.loads(raw) if raw else {}
+        except ValueError:
+            continue
+        food_db = data.pop('food_database', None)
+        if food_db is None:
+            continue
+        items = []
+        for name, calories in food_db.items():
+            try:
+                calories = int(round(float(calories)))
+            except (TypeError, ValueError):
+                continue
+            items.append({
+                'profile_name': profile_name,
+                'name': name,
+                'calories_per_unit': calories,
+                'created_at': now,
+                'updated_at': now
+            })
+        if items:
+            op.bulk_insert(food_items_table, items)
+        conn.execute(
+            profiles_table.update()
+            .where(profiles_table.c.profile_name == profile_name)
+            .values(data=json.dumps(data), version=profiles_table.c.version + 1)
+        )
+
+
+def downgrade():
+    """Fold food_items back into each profile's JSON blob and drop the table."""
+    conn = op.get_bind()
+    food_dbs = {}
+    for profile_name, name, calories in conn.execute(sa.select(
+            food_items_table.c.profile_name, food_items_table.c.name,
+            food_items_table.c.calories_per_unit)):
+        food_dbs.setdefault(profile_name, {})[name] = calories
+
+    rows = conn.execute(sa.select(profiles_table.c.profile_name, profiles_table.c.data)).fetchall()
+    for profile_name, raw in rows:
+        data = json.loads(raw) if raw else {}
+        data['food_database'] = food_dbs.get(profile_name, {})
+        conn.execute(
+            profiles_table.update()
+            .where(profiles_table.c.profile_name == profile_name)
+            .values(data=json.dumps(data), version=profiles_table.c.version + 1)
+        )
+
+    with op.batch_alter_table('food_items', schema=None) as batch_op:
+        batch_op.drop_index('uq_food_items_profile_name')
+    op.drop_table('food_items')
@@ -0,0 +1,33 @@
+"""Add food_db_generation to profiles
+
+Revision ID: d8f2b6c4e7a1
+Revises: c3e7a9f1b542
+Create Date: 2026-10-18 17:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+# revision identifiers, used by Alembic.
+revision = 'd8f2b6c4e7a1'
+down_revision = 'c3e7a9f1b542'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Add the counter bumped on every food database write, used to invalidate food search indexes."""
+    conn = op.get_bind()
+    inspector = inspect(conn)
+
+    columns = [col['name'] for col in inspector.get_columns('profiles')]
+    if 'food_db_generation' not in columns:
+        op.add_column('profiles', sa.Column('food_db_generation', sa.Integer(), nullable=False,
+                                            server_default='0'))
+
+
+def downgrade():
+    with op.batch_alter_table('profiles') as batch_op:
+        batch_op.drop_column('food_db_generation')
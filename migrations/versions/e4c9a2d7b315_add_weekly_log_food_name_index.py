@@ -0,0 +1,32 @@
+"""Index weekly_log by (profile_name, food_name)
+
+Revision ID: e4c9a2d7b315
+Revises: d8f2b6c4e7a1
+Create Date: 2026-10-18 20:40:00.000000
+
+"""
+from alembic import op
+from sqlalchemy import inspect
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4c9a2d7b315'
+down_revision = 'd8f2b6c4e7a1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Let food renames and deletes find every logged entry of a food without a scan."""
+    conn = op.get_bind()
+    inspector = inspect(conn)
+
+    indexes = [index['name'] for index in inspector.get_indexes('weekly_log')]
+    if 'idx_weekly_log_profile_food' not in indexes:
+        with op.batch_alter_table('weekly_log', schema=None) as batch_op:
+            batch_op.create_index('idx_weekly_log_profile_food', ['profile_name', 'food_name'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('weekly_log', schema=None) as batch_op:
+        batch_op.drop_index('idx_weekly_log_profile_food')
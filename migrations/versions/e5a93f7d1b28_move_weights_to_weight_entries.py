@@ -0,0 +1,108 @@
+"""Move logged weights into the weight_entries table
+
+Revision ID: e5a93f7d1b28
+Revises: d2e8b5c4a617
+Create Date: 2026-10-18 11:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+import datetime
+import json
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5a93f7d1b28'
+down_revision = 'd2e8b5c4a617'
+branch_labels = None
+depends_on = None
+
+
+profiles_table = sa.table('profiles',
+    sa.column('profile_name', sa.String),
+    sa.column('data', sa.Text),
+    sa.column('version', sa.Integer)
+)
+
+weight_entries_table = sa.table('weight_entries',
+    sa.column('profile_name', sa.String),
+    sa.column('date', sa.String),
+    sa.column('weight', sa.Float),
+    sa.column('created_at', sa.DateTime)
+)
+
+
+def upgrade():
+    """Create weight_entries and move each profile's weights dict out of the JSON blob."""
+    conn = op.get_bind()
+    inspector = inspect(conn)
+
+    if 'weight_entries' not in inspector.get_table_names():
+        op.create_table('weight_entries',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('profile_name', sa.String(), nullable=False),
+        sa.Column('date', sa.String(), nullable=False),
+        sa.Column('weight', sa.Float(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['profile_name'], ['profiles.profile_name'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+        with op.batch_alter_table('weight_entries', schema=None) as batch_op:
+            batch_op.create_index('uq_weight_entries_profile_date', ['profile_name', 'date'], unique=True)
+
+    now = datetime.datetime.utcnow()
+    rows = conn.execute(sa.select(profiles_table.c.profile_name, profiles_table.c.data)).fetchall()
+    for profile_name, raw in rows:
+        try:
+            data = json.loads(raw) if raw else {}
+        except ValueError:
+            continue
+        weights = data.pop('weights', None)
+        if weights is None:
+            continue
+        if isinstance(weights, str):
+            weights = json.loads(weights)
+        entries = []
+        for date, weight in weights.items():
+            try:
+                weight = float(weight)
+            except (TypeError, ValueError):
+                continue
+            entries.append({
+                'profile_name': profile_name,
+                'date': date,
+                'weight': weight,
+                'created_at': now
+            })
+        if entries:
+            op.bulk_insert(weight_entries_table, entries)
+        conn.execute(
+            profiles_table.update()
+            .where(profiles_table.c.profile_name == profile_name)
+            .values(data=json.dumps(data), version=profiles_table.c.version + 1)
+        )
+
+
+def downgrade():
+    """Fold weight_entries back into each profile's JSON blob and drop the table."""
+    conn = op.get_bind()
+    weights = {}
+    for profile_name, date, weight in conn.execute(sa.select(
+            weight_entries_table.c.profile_name, weight_entries_table.c.date,
+            weight_entries_table.c.weight)):
+        weights.setdefault(profile_name, {})[date] = weight
+
+    rows = conn.execute(sa.select(profiles_table.c.profile_name, profiles_table.c.data)).fetchall()
+    for profile_name, raw in rows:
+        data = json.loads(raw) if raw else {}
+        data['weights'] = weights.get(profile_name, {})
+        conn.execute(
+            profiles_table.update()
+            .where(profiles_table.c.profile_name == profile_name)
+            .values(data=json.dumps(data), version=profiles_table.c.version + 1)
+        )
+
+    with op.batch_alter_table('weight_entries', schema=None) as batch_op:
+        batch_op.drop_index('uq_weight_entries_profile_date')
+    op.drop_table('weight_entries')
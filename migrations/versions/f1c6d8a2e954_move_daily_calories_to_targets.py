@@ -0,0 +1,109 @@
+"""Move daily calorie limits into effective-dated daily_calorie_targets
+
+Revision ID: f1c6d8a2e954
+Revises: e5a93f7d1b28
+Create Date: 2026-10-18 12:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+import datetime
+import json
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1c6d8a2e954'
+down_revision = 'e5a93f7d1b28'
+branch_labels = None
+depends_on = None
+
+
+profiles_table = sa.table('profiles',
+    sa.column('profile_name', sa.String),
+    sa.column('data', sa.Text),
+    sa.column('version', sa.Integer)
+)
+
+targets_table = sa.table('daily_calorie_targets',
+    sa.column('profile_name', sa.String),
+    sa.column('effective_date', sa.String),
+    sa.column('calories', sa.Integer),
+    sa.column('created_at', sa.DateTime)
+)
+
+
+def upgrade():
+    """Create daily_calorie_targets; each stored per-day limit becomes a target effective from that day."""
+    conn = op.get_bind()
+    inspector = inspect(conn)
+
+    if 'daily_calorie_targets' not in inspector.get_table_names():
+        op.create_table('daily_calorie_targets',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('profile_name', sa.String(), nullable=False),
+        sa.Column('effective_date', sa.String(), nullable=False),
+        sa.Column('calories', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['profile_name'], ['profiles.profile_name'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+        with op.batch_alter_table('daily_calorie_targets', schema=None) as batch_op:
+            batch_op.create_index('uq_daily_calorie_targets_profile_date',
+                                  ['profile_name', 'effective_date'], unique=True)
+
+    now = datetime.datetime.utcnow()
+    rows = conn.execute(sa.select(profiles_table.c.profile_name, profiles_table.c.data)).fetchall()
+    for profile_name, raw in rows:
+        try:
+            data = json.loads(raw) if raw else {}
+        except ValueError:
+            continue
+        daily_calories = data.pop('daily_calories', None)
+        if daily_calories is None:
+            continue
+        if isinstance(daily_calories, str):
+            daily_calories = json.loads(daily_calories)
+        targets = []
+        for date, calories in daily_calories.items():
+            try:
+                calories = int(calories)
+            except (TypeError, ValueError):
+                continue
+            targets.append({
+                'profile_name': profile_name,
+                'effective_date': date,
+                'calories': calories,
+                'created_at': now
+            })
+        if targets:
+            op.bulk_insert(targets_table, targets)
+        conn.execute(
+            profiles_table.update()
+            .where(profiles_table.c.profile_name == profile_name)
+            .values(data=json.dumps(data), version=profiles_table.c.version + 1)
+        )
+
+
+def downgrade():
+    """Fold targets back into each profile's daily_calories dict and drop the table."""
+    conn = op.get_bind()
+    targets = {}
+    for profile_name, date, calories in conn.execute(sa.select(
+            targets_table.c.profile_name, targets_table.c.effective_date,
+            targets_table.c.calories)):
+        targets.setdefault(profile_name, {})[date] = calories
+
+    rows = conn.execute(sa.select(profiles_table.c.profile_name, profiles_table.c.data)).fetchall()
+    for profile_name, raw in rows:
+        data = json.loads(raw) if raw else {}
+        data['daily_calories'] = targets.get(profile_name, {})
+        conn.execute(
+            profiles_table.update()
+            .where(profiles_table.c.profile_name == profile_name)
+            .values(data=json.dumps(data), version=profiles_table.c.version + 1)
+        )
+
+    with op.batch_alter_table('daily_calorie_targets', schema=None) as batch_op:
+        batch_op.drop_index('uq_daily_calorie_targets_profile_date')
+    op.drop_table('daily_calorie_targets')
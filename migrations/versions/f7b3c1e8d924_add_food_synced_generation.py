@@ -0,0 +1,35 @@
+"""Add food_synced_generation to profiles
+
+Revision ID: f7b3c1e8d924
+Revises: e4c9a2d7b315
+Create Date: 2026-10-18 21:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+# revision identifiers, used by Alembic.
+revision = 'f7b3c1e8d924'
+down_revision = 'e4c9a2d7b315'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Track the food_db_generation last applied to weekly_log; every profile syncs once after this."""
+    conn = op.get_bind()
+    inspector = inspect(conn)
+
+    columns = [col['name'] for col in inspector.get_columns('profiles')]
+    if 'food_synced_generation' not in columns:
+        op.add_column('profiles', sa.Column('food_synced_generation', sa.Integer(), nullable=False,
+                                            server_default='0'))
+        # Start one generation behind so the next view syncs entries logged before tracking existed
+        op.execute("UPDATE profiles SET food_synced_generation = food_db_generation - 1")
+
+
+def downgrade():
+    with op.batch_alter_table('profiles') as batch_op:
+        batch_op.drop_column('food_synced_generation')
@@ -8,6 +8,8 @@ try:
     String = db.String
     Text = db.Text
     Integer = db.Integer
+    Float = db.Float
+    Boolean = db.Boolean
     DateTime = db.DateTime
     ForeignKey = db.ForeignKey
     Index = db.Index
@@ -15,19 +17,27 @@ try:
 except ImportError:
     # Fall back to regular SQLAlchemy (for standalone scripts)
     from sqlalchemy.ext.declarative import declarative_base
-    from sqlalchemy import Column, String, Text, Integer, DateTime, ForeignKey, Index
+    from sqlalchemy import Column, String, Text, Integer, Float, Boolean, DateTime, ForeignKey, Index
     from sqlalchemy.orm import relationship
     Base = declarative_base()
 
 class Profile(Base):
     __tablename__ = 'profiles'
     profile_name = Column(String, primary_key=True)
-    data = Column(Text)  # JSON string for food_database and settings only
+    data = Column(Text)  # JSON string for profile settings (foods live in food_items)
     uuid = Column(String, unique=True, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
+    version = Column(Integer, nullable=False, default=1, server_default='1')  # Bumped on every save of data
+    food_db_generation = Column(Integer, nullable=False, default=0, server_default='0')  # Bumped on every food_items write
+    food_synced_generation = Column(Integer, nullable=False, default=0, server_default='0')  # food_db_generation last applied to weekly_log
     
     # Relationship to weekly logs
     weekly_logs = relationship("WeeklyLog", back_populates="profile", cascade="all, delete-orphan")
+    food_items = relationship("FoodItem", back_populates="profile", cascade="all, delete-orphan")
+    weight_entries = relationship("WeightEntry", back_populates="profile", cascade="all, delete-orphan")
+    calorie_targets = relationship("DailyCalorieTarget", back_populates="profile", cascade="all, delete-orphan")
+    daily_totals = relationship("DailyTotal", back_populates="profile", cascade="all, delete-orphan")
+    changes = relationship("ChangeLog", back_populates="profile", cascade="all, delete-orphan")
 
 class WeeklyLog(Base):
     __tablename__ = 'weekly_log'
@@ -39,6 +49,7 @@ class WeeklyLog(Base):
     food_name = Column(String, nullable=False)
     calories = Column(Integer, nullable=False)
     quantity = Column(Integer, default=1, nullable=False)
+    manual_calories = Column(Boolean, default=False, nullable=False, server_default='0')  # Calories entered by hand, not per-unit * quantity
     created_at = Column(DateTime, default=datetime.utcnow)
     
     # Relationship back to profile
@@ -47,4 +58,94 @@ class WeeklyLog(Base):
     # Add composite index for common queries
     __table_args__ = (
         Index('idx_profile_date', 'profile_name', 'date'),
+        Index('idx_weekly_log_profile_food', 'profile_name', 'food_name'),
     )
+
+class FoodItem(Base):
+    __tablename__ = 'food_items'
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    profile_name = Column(String, ForeignKey('profiles.profile_name'), nullable=False)
+    name = Column(String, nullable=False)
+    calories_per_unit = Column(Integer, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+    
+    profile = relationship("Profile", back_populates="food_items")
+    
+    # One row per food name per profile; also serves single-row upserts
+    __table_args__ = (
+        Index('uq_food_items_profile_name', 'profile_name', 'name', unique=True),
+    )
+
+class WeightEntry(Base):
+    __tablename__ = 'weight_entries'
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    profile_name = Column(String, ForeignKey('profiles.profile_name'), nullable=False)
+    date = Column(String, nullable=False)  # YYYY-MM-DD, sorts chronologically
+    weight = Column(Float, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    profile = relationship("Profile", back_populates="weight_entries")
+    
+    # One weight per day; serves point, previous-day and range lookups
+    __table_args__ = (
+        Index('uq_weight_entries_profile_date', 'profile_name', 'date', unique=True),
+    )
+
+class DailyCalorieTarget(Base):
+    """Daily calorie limit in force from effective_date until the next row."""
+    __tablename__ = 'daily_calorie_targets'
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    profile_name = Column(String, ForeignKey('profiles.profile_name'), nullable=False)
+    effective_date = Column(String, nullable=False)  # YYYY-MM-DD
+    calories = Column(Integer, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    profile = relationship("Profile", back_populates="calorie_targets")
+    
+    # Resolving the target for a date is a <= D ORDER BY DESC LIMIT 1 seek on this index
+    __table_args__ = (
+        Index('uq_daily_calorie_targets_profile_date', 'profile_name', 'effective_date', unique=True),
+    )
+
+class DailyTotal(Base):
+    """Per-day calorie totals, kept in step with weekly_log in the same transaction."""
+    __tablename__ = 'daily_totals'
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    profile_name = Column(String, ForeignKey('profiles.profile_name'), nullable=False)
+    date = Column(String, nullable=False)  # YYYY-MM-DD
+    total_calories = Column(Integer, default=0, nullable=False)
+    breakfast_calories = Column(Integer, default=0, nullable=False)
+    lunch_calories = Column(Integer, default=0, nullable=False)
+    dinner_calories = Column(Integer, default=0, nullable=False)
+    snack_calories = Column(Integer, default=0, nullable=False)
+    entry_count = Column(Integer, default=0, nullable=False)
+    
+    profile = relationship("Profile", back_populates="daily_totals")
+    
+    __table_args__ = (
+        Index('uq_daily_totals_profile_date', 'profile_name', 'date', unique=True),
+    )
+
+class ChangeLog(Base):
+    """Latest change per synced row; the id is the delta-sync cursor.
+
+    Recording a change replaces the previous one for the same key, so the
+    table holds one row per live row or tombstone rather than every write.
+    """
+    __tablename__ = 'change_log'
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    profile_name = Column(String, ForeignKey('profiles.profile_name'), nullable=False)
+    entity = Column(String, nullable=False)  # entry, food, weight, target or profile
+    entity_key = Column(String, nullable=False)  # food_id, food name, date, effective_date or profile_name
+    op = Column(String, nullable=False)  # upsert or delete
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    profile = relationship("Profile", back_populates="changes")
+    
+    # sqlite_autoincrement stops SQLite reusing the id of a replaced latest change
+    __table_args__ = (
+        Index('idx_change_log_profile_id', 'profile_name', 'id'),
+        Index('uq_change_log_profile_entity_key', 'profile_name', 'entity', 'entity_key', unique=True),
+        {'sqlite_autoincrement': True},
+    )
\ No newline at end of file
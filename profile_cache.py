@@ -0,0 +1,141 @@
+"""Process-wide LRU cache of decoded profile documents."""
+import threading
+import time
+from collections import OrderedDict
+
+
+class ProfileCache:
+    """Bounded LRU of profile_name -> (version, decoded document).
+
+    Entries are only served when the caller's version matches the cached one,
+    so a bumped Profile.version invalidates stale documents on every worker.
+    Cached documents are shared between requests and must not be mutated.
+    """
+
+    def __init__(self, max_entries=256, max_bytes=32 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # profile_name -> (version, document, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def peek_version(self, profile_name):
+        """Return the cached version for a profile without touching LRU order."""
+        with self._lock:
+            entry = self._entries.get(profile_name)
+            return entry[0] if entry else None
+
+    def get(self, profile_name, version):
+        """Return the cached document if it is at `version`, else None."""
+        with self._lock:
+            entry = self._entries.get(profile_name)
+            if entry is None or entry[0] != version:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(profile_name)
+            self.hits += 1
+            return entry[1]
+
+    def record_miss(self):
+        """Count a lookup that was answered without consulting the cache."""
+        with self._lock:
+            self.misses += 1
+
+    def put(self, profile_name, version, document, size):
+        """Cache a decoded document; `size` is the length of its JSON source."""
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._remove(profile_name)
+            self._entries[profile_name] = (version, document, size)
+            self._bytes += size
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def invalidate(self, profile_name):
+        with self._lock:
+            self._remove(profile_name)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def _remove(self, profile_name):
+        entry = self._entries.pop(profile_name, None)
+        if entry:
+            self._bytes -= entry[2]
+
+
+
+class UuidCache:
+    """Bounded LRU of profile uuid -> profile_name for cookie and magic-link logins.
+
+    Entries expire after `ttl` seconds so a profile deleted by another worker
+    stops resolving here too; deletes in this worker invalidate immediately.
+    """
+
+    def __init__(self, max_entries=1024, ttl=300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # uuid -> (profile_name, expires_at)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, profile_uuid):
+        with self._lock:
+            entry = self._entries.get(profile_uuid)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[1] < time.monotonic():
+                del self._entries[profile_uuid]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(profile_uuid)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, profile_uuid, profile_name):
+        with self._lock:
+            self._entries[profile_uuid] = (profile_name, time.monotonic() + self.ttl)
+            self._entries.move_to_end(profile_uuid)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate_profile(self, profile_name):
+        """Drop every uuid that resolves to `profile_name`."""
+        with self._lock:
+            for key in [k for k, (name, _) in self._entries.items() if name == profile_name]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
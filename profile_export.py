@@ -0,0 +1,108 @@
+"""Streaming serializers and parsers for profile exports (NDJSON or CSV, optionally gzipped)."""
+import csv
+import gzip
+import io
+import json
+import zlib
+
+# One flat column set shared by every record type in CSV exports
+CSV_FIELDS = [
+    "type", "profile", "date", "meal_type", "food_id", "name", "calories",
+    "quantity", "manual_calories", "weight", "uuid", "data"
+]
+
+CHUNK_SIZE = 64 * 1024
+
+FORMATS = {
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "csv": ("text/csv", "csv"),
+}
+
+
+def _buffered(lines):
+    """Join small lines into ~CHUNK_SIZE strings so the response is not one write per row."""
+    buffer = []
+    size = 0
+    for line in lines:
+        buffer.append(line)
+        size += len(line)
+        if size >= CHUNK_SIZE:
+            yield "".join(buffer)
+            buffer = []
+            size = 0
+    if buffer:
+        yield "".join(buffer)
+
+
+def iter_ndjson(records):
+    return _buffered(json.dumps(record, separators=(",", ":")) + "\n" for record in records)
+
+
+def iter_csv(records):
+    def lines():
+        out = io.StringIO()
+        writer = csv.DictWriter(out, fieldnames=CSV_FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        for record in records:
+            if isinstance(record.get("data"), dict):
+                record = dict(record, data=json.dumps(record["data"]))
+            writer.writerow(record)
+            yield out.getvalue()
+            out.seek(0)
+            out.truncate()
+        yield out.getvalue()
+    return _buffered(lines())
+
+
+def gzip_chunks(chunks):
+    """Gzip a stream of text chunks incrementally."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 writes a gzip header
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode("utf-8"))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def serialize(records, fmt="ndjson", compress=False):
+    """Return (chunk iterator, mimetype, file extension) for `records` in `fmt`."""
+    mimetype, extension = FORMATS[fmt]
+    chunks = iter_csv(records) if fmt == "csv" else iter_ndjson(records)
+    if compress:
+        return gzip_chunks(chunks), "application/gzip", extension + ".gz"
+    return chunks, mimetype, extension
+
+
+def detect_format(filename="", mimetype=""):
+    """Guess (format, gzipped) from a file name or content type; defaults to NDJSON."""
+    filename = (filename or "").lower()
+    compressed = filename.endswith(".gz")
+    if compressed:
+        filename = filename[:-3]
+    fmt = "csv" if filename.endswith(".csv") or mimetype == "text/csv" else "ndjson"
+    return fmt, compressed
+
+
+def parse(stream, fmt="ndjson", compressed=False):
+    """Yield record dicts from a binary stream without reading it all into memory.
+
+    Undecodable NDJSON lines are yielded as ValueError instances so the
+    caller can report them and carry on.
+    """
+    if compressed:
+        stream = gzip.GzipFile(fileobj=stream)
+    text = io.TextIOWrapper(stream, encoding="utf-8", newline="")
+    if fmt == "csv":
+        for row in csv.DictReader(text):
+            yield {key: value for key, value in row.items() if value not in ("", None)}
+        return
+    for line in text:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield ValueError(f"invalid JSON: {e}")
+            continue
+        yield record if isinstance(record, dict) else ValueError("record is not a JSON object")
@@ -187,6 +187,8 @@ def run_migrations():
                     # Existing database without migration history
                     logger.info("Stamping database as migrated...")
                     stamp(revision='b23af7e857f9')
+                    # Apply any migrations added after the stamped baseline
+                    upgrade()
                 else:
                     # Fresh database
                     logger.info("Fresh database detected. Running all migrations...")
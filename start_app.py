@@ -5,31 +5,68 @@ import os
 import sys
 import subprocess
 import logging
+import time
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+def schema_is_current():
+    """Return True when alembic_version already holds the migration script head.
+
+    One query against the database plus a parse of migrations/versions; no
+    Flask app is built. Any error (e.g. no alembic_version table yet) means
+    the full migration path has to run.
+    """
+    from alembic.config import Config
+    from alembic.script import ScriptDirectory
+    from sqlalchemy import text
+    from db_orm import engine
+    
+    migrations_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+    config = Config(os.path.join(migrations_dir, "alembic.ini"))
+    config.set_main_option("script_location", migrations_dir)
+    heads = set(ScriptDirectory.from_config(config).get_heads())
+    try:
+        with engine.connect() as conn:
+            current = {row[0] for row in conn.execute(text("SELECT version_num FROM alembic_version"))}
+    except Exception as e:
+        logger.info(f"Could not read alembic_version ({e.__class__.__name__}); running migrations.")
+        return False
+    finally:
+        engine.dispose()
+    logger.info(f"Schema revision {sorted(current)}, script head {sorted(heads)}")
+    return current == heads
+
 def main():
     """Run migrations and start the application."""
     
+    started = time.perf_counter()
     logger.info("Starting CalorieTracker deployment...")
     
-    # Run migrations
-    logger.info("Running database migrations...")
-    result = subprocess.run([sys.executable, "run_migrations.py"], capture_output=True, text=True)
-    
-    if result.returncode != 0:
-        logger.error(f"Migration failed: {result.stderr}")
-        sys.exit(1)
+    check_started = time.perf_counter()
+    current = schema_is_current()
+    logger.info(f"Schema check took {time.perf_counter() - check_started:.3f}s")
     
-    logger.info("Migrations completed successfully.")
+    if current:
+        logger.info("Schema is up to date; skipping migrations.")
+    else:
+        # Run migrations
+        logger.info("Running database migrations...")
+        migration_started = time.perf_counter()
+        result = subprocess.run([sys.executable, "run_migrations.py"], capture_output=True, text=True)
+        
+        if result.returncode != 0:
+            logger.error(f"Migration failed: {result.stderr}")
+            sys.exit(1)
+        
+        logger.info(f"Migrations completed successfully in {time.perf_counter() - migration_started:.3f}s.")
     
     # Get port from environment
     port = os.environ.get('PORT', '8000')
-    logger.info(f"Starting Gunicorn server on port {port}...")
+    logger.info(f"Starting Gunicorn server on port {port} ({time.perf_counter() - started:.3f}s after launch)...")
     
-    # Start gunicorn
-    os.execvp("gunicorn", ["gunicorn", "CalorieApp:app", "--bind", f"0.0.0.0:{port}"])
+    # Start gunicorn with the production profile (workers, preload, recycling)
+    os.execvp("gunicorn", ["gunicorn", "-c", "gunicorn.conf.py", "CalorieApp:app", "--bind", f"0.0.0.0:{port}"])
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,81 @@
+"""Shared fixtures: the app and data layer run against a throwaway SQLite database."""
+import os
+import sys
+import tempfile
+
+import pytest
+
+# Configure before anything imports db_orm, which builds the engine at import time
+_tmp_dir = tempfile.mkdtemp(prefix="calorietracker-tests-")
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(_tmp_dir, "test.db")
+os.environ["FOOD_CATALOG_PATH"] = os.path.join(_tmp_dir, "no_catalog.csv")
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+os.environ.setdefault("ADMIN_BACKUP_KEY", "test-admin-key")
+os.environ.setdefault("SYNC_TOKEN", "test-sync-token")
+# Short pool timeout so pool exhaustion tests fail fast
+os.environ["DB_POOL_TIMEOUT"] = "0.5"
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import CalorieApp  # noqa: E402
+import db_handler_orm  # noqa: E402
+from db_orm import engine  # noqa: E402
+from models import Base  # noqa: E402
+
+Base.metadata.create_all(engine)
+
+
+@pytest.fixture(autouse=True)
+def clean_state():
+    """Empty every table and in-process cache between tests."""
+    yield
+    with engine.begin() as conn:
+        for table in reversed(Base.metadata.sorted_tables):
+            conn.execute(table.delete())
+    db_handler_orm._profile_cache.clear()
+    db_handler_orm._uuid_cache.clear()
+    db_handler_orm._food_indexes.clear()
+    if CalorieApp.limiter:
+        CalorieApp.limiter.reset()
+
+
+@pytest.fixture
+def app():
+    CalorieApp.app.config.update(TESTING=True, WTF_CSRF_ENABLED=False)
+    return CalorieApp.app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def admin_token():
+    """Value for X-Admin-Key / ?token= on admin endpoints."""
+    return CalorieApp.ADMIN_BACKUP_KEY
+
+
+@pytest.fixture
+def profile():
+    """A fresh, empty profile; returns its name."""
+    db_handler_orm.save_profile("alice", {})
+    return "alice"
+
+
+@pytest.fixture
+def make_entry():
+    """Build a log entry dict in the shape add_food_entries and /api/log/batch take."""
+    def make(food_id, food_name="Apple", date="2024-01-01", calories=95, quantity=1, meal_type="lunch"):
+        return {"date": date, "meal_type": meal_type, "food_id": food_id, "food_name": food_name,
+                "calories": calories, "quantity": quantity}
+    return make
+
+
+@pytest.fixture
+def logged_entries():
+    """Return {food_id: entry} for everything in a profile's weekly_log."""
+    def logged(profile_name):
+        return {entry["id"]: entry for meals in db_handler_orm.get_weekly_log(profile_name).values()
+                for entries in meals.values() for entry in entries}
+    return logged
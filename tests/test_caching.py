@@ -0,0 +1,51 @@
+import db_handler_orm
+
+NO_STORE = "no-store, no-cache, must-revalidate, post-check=0, pre-check=0, max-age=0"
+
+
+def test_etag_responses_are_private_and_revalidated(client, profile):
+    db_handler_orm.set_food_calories(profile, "Apple", 95)
+
+    response = client.get(f"/api/food_database/{profile}")
+    assert response.status_code == 200
+    assert response.headers["Cache-Control"] == "private, no-cache"
+
+    etag = response.headers["ETag"]
+    revalidated = client.get(f"/api/food_database/{profile}", headers={"If-None-Match": etag})
+    assert revalidated.status_code == 304
+    assert revalidated.headers["Cache-Control"] == "private, no-cache"
+
+
+def test_other_json_responses_are_not_marked_revalidatable(client, admin_token):
+    response = client.get(f"/internal/stats?token={admin_token}")
+
+    assert response.status_code == 200
+    assert response.mimetype == "application/json"
+    assert response.headers["Cache-Control"] == NO_STORE
+
+
+def test_pages_are_not_stored(client, profile):
+    client.post("/select_profile", data={"profile_name": profile})
+
+    response = client.get("/home")
+
+    assert response.status_code == 200
+    assert response.headers["Cache-Control"] == NO_STORE
+
+
+def test_etag_depends_on_query_string(client, profile, make_entry):
+    db_handler_orm.add_food_entries(profile, [make_entry(day, date=day) for day in ("2024-01-01", "2024-01-02", "2024-01-03")])
+    first_page = client.get(f"/api/history/{profile}?limit=1")
+    etag = first_page.headers["ETag"]
+
+    # Another page, or the same args in another order, must not reuse the wrong validator
+    other_page = client.get(f"/api/history/{profile}?limit=1&before=2024-01-03", headers={"If-None-Match": etag})
+    assert other_page.status_code == 200
+    assert other_page.get_json() != first_page.get_json()
+    assert client.get(f"/api/history/{profile}?limit=2", headers={"If-None-Match": etag}).status_code == 200
+    assert client.get(f"/api/history/{profile}?limit=1", headers={"If-None-Match": etag}).status_code == 304
+
+    reordered = client.get(f"/api/weight/{profile}?start=2024-01-01&end=2024-01-31")
+    same = client.get(f"/api/weight/{profile}?end=2024-01-31&start=2024-01-01",
+                      headers={"If-None-Match": reordered.headers["ETag"]})
+    assert same.status_code == 304
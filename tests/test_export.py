@@ -0,0 +1,82 @@
+import gzip
+import io
+import json
+import os
+
+import db_handler_orm
+import profile_export
+from test_import import RECORDS, _import, _ndjson
+
+
+def _download(client, **params):
+    params.setdefault("token", os.environ["SYNC_TOKEN"])
+    return client.get("/download_profiles", query_string=params)
+
+
+def _records(body):
+    return [json.loads(line) for line in body.decode("utf-8").splitlines()]
+
+
+def test_download_requires_sync_token(client, profile):
+    assert _download(client, token="wrong").status_code == 401
+    assert client.get("/download_profiles").status_code == 401
+
+
+def test_download_streams_every_record_type_as_ndjson(client, profile):
+    _import(client, profile, _ndjson(RECORDS))
+    db_handler_orm.save_profile("bob", {})
+
+    response = _download(client, profile=profile)
+
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert response.mimetype == "application/x-ndjson"
+    assert 'filename="calorie_tracker_export.ndjson"' in response.headers["Content-Disposition"]
+    records = _records(response.get_data())
+    assert {record["profile"] for record in records} == {profile}
+    assert [record["type"] for record in records] == ["profile", "food", "food", "weight", "target", "entry", "entry"]
+    assert {record["food_id"]: record["calories"] for record in records if record["type"] == "entry"} == \
+        {"imp-1": 95, "imp-2": 400}
+    assert {record["profile"] for record in _records(_download(client).get_data())} == {profile, "bob"}
+
+
+def test_download_rejects_unknown_profile_and_format(client, profile):
+    assert _download(client, profile="nobody").status_code == 404
+    assert _download(client, profile=profile, format="xml").status_code == 400
+
+
+def test_gzipped_csv_export_round_trips_through_import(client, profile):
+    _import(client, profile, _ndjson(RECORDS))
+    log, weights = db_handler_orm.get_weekly_log(profile), db_handler_orm.get_weights(profile)
+
+    response = _download(client, profile=profile, format="csv", gzip="1")
+
+    assert response.mimetype == "application/gzip"
+    assert 'filename="calorie_tracker_export.csv.gz"' in response.headers["Content-Disposition"]
+    body = response.get_data()
+    header = gzip.decompress(body).decode("utf-8").splitlines()[0]
+    assert header.split(",") == profile_export.CSV_FIELDS
+    assert len(list(profile_export.parse(io.BytesIO(body), "csv", compressed=True))) == 7
+
+    db_handler_orm.delete_profile(profile)
+    db_handler_orm.save_profile(profile, {})
+    stats = client.post(f"/api/import/{profile}?format=csv&gzip=1", data=body,
+                        content_type="application/octet-stream").get_json()
+
+    assert stats["invalid"] == 0
+    assert stats["entries_inserted"] == 2
+    assert db_handler_orm.get_weekly_log(profile) == log
+    assert db_handler_orm.get_weights(profile) == weights
+
+
+def test_export_downloads_the_selected_profile(client, profile):
+    _import(client, profile, _ndjson(RECORDS))
+    db_handler_orm.save_profile("bob", {})
+    with client.session_transaction() as session:
+        session["current_profile"] = profile
+
+    response = client.get("/export")
+
+    assert response.status_code == 200
+    assert 'filename="calorie_tracker_alice.ndjson"' in response.headers["Content-Disposition"]
+    assert {record["profile"] for record in _records(response.get_data())} == {profile}
@@ -0,0 +1,153 @@
+import random
+
+import pytest
+
+from food_index import FoodIndex, FoodIndexCache, _at_least, trigrams
+
+WORDS = ["chicken", "breast", "beef", "salmon", "broccoli", "rice", "brown", "apple", "banana",
+         "greek", "yoghurt", "cheese", "egg", "fried", "soup", "tomato", "oat", "peanut", "butter", "cake"]
+QUERIES = ["chiken", "brocoli", "yogurt greek", "samlon", "peanut buter", "brown rice", "Apple",
+           "egg fried", "a", "zzz", "tomato soup cake", "CHEESE"]
+
+
+def _foods(rng, count):
+    foods = {}
+    while len(foods) < count:
+        name = " ".join(rng.sample(WORDS, rng.randint(1, 3)))
+        if rng.random() < 0.5:
+            name = name.capitalize()
+        foods[name] = rng.randint(10, 900)
+    return foods
+
+
+def brute_force_search(foods, prefix, limit):
+    prefix = prefix.casefold()
+    names = sorted((name.casefold(), name) for name in foods)
+    return [(name, foods[name]) for key, name in names if key.startswith(prefix)][:limit]
+
+
+def brute_force_fuzzy(foods, query, threshold):
+    """Every food at or above `threshold`, best first, by direct trigram set comparison."""
+    grams = trigrams(query)
+    if not grams:
+        return []
+    scored = []
+    for name, calories in foods.items():
+        other = trigrams(name)
+        similarity = len(grams & other) / len(grams | other)
+        if similarity >= threshold:
+            scored.append((-similarity, name.casefold(), name, calories))
+    return [(name, calories, -negated) for negated, _, name, calories in sorted(scored)]
+
+
+def assert_matches_brute_force(index, foods):
+    assert len(index) == len(foods)
+    for query in QUERIES:
+        for threshold in (0.1, 0.3, 0.6):
+            ranked = brute_force_fuzzy(foods, query, threshold)
+            for limit in (1, 3, 10, 50):
+                assert index.fuzzy_search(query, limit, threshold) == ranked[:limit], (query, limit, threshold)
+        for limit in (1, 10):
+            assert index.search(query[:3], limit) == brute_force_search(foods, query[:3], limit)
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_fresh_index_matches_brute_force(seed):
+    foods = _foods(random.Random(seed), 300)
+
+    assert_matches_brute_force(FoodIndex(foods.items()), foods)
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_updated_index_matches_brute_force(seed):
+    rng = random.Random(seed)
+    foods = _foods(rng, 200)
+    index = FoodIndex(foods.items())
+    slots = len(index._names)
+
+    for _ in range(20):
+        upserts, removals = [], []
+        names = list(foods)
+        for name in rng.sample(names, 5):  # renames
+            new_name = f"{name} {rng.choice(WORDS)}"
+            if new_name not in foods:
+                removals.append(name)
+                foods[new_name] = foods.pop(name)
+                upserts.append((new_name, foods[new_name]))
+        for name in rng.sample([name for name in names if name in foods], 5):  # deletes
+            removals.append(name)
+            del foods[name]
+        for name in rng.sample(list(foods), 3):  # calorie changes
+            foods[name] += 1
+            upserts.append((name, foods[name]))
+        for name in _foods(rng, 3):  # new foods, usually filling freed slots
+            if name not in foods:
+                foods[name] = 100
+                upserts.append((name, 100))
+        index.update(upserts, removals)
+
+        assert_matches_brute_force(index, foods)
+        assert all(mask for mask in index._postings.values())
+
+    # Freed slots were reused rather than growing the index
+    assert len(index._names) == slots
+
+
+def test_update_remove_then_readd_same_name():
+    index = FoodIndex([("Apple", 95), ("Apricot", 17)])
+
+    index.update(removals=["Apple"])
+    assert "Apple" not in index
+    assert index.fuzzy_search("apple", 5) == []
+
+    index.update(upserts=[("Apple", 100)])
+    assert index.search("ap") == [("Apple", 100), ("Apricot", 17)]
+    assert index.fuzzy_search("apple", 1) == [("Apple", 100, 1.0)]
+
+
+def test_at_least_matches_counts():
+    rng = random.Random(7)
+    counts = [rng.randint(0, 20) for _ in range(500)]
+    slices = [0] * max(counts).bit_length()
+    for slot, count in enumerate(counts):
+        for bit in range(len(slices)):
+            if count >> bit & 1:
+                slices[bit] |= 1 << slot
+    every_slot = (1 << len(counts)) - 1
+
+    for value in range(0, 2 ** len(slices) + 2):
+        expected = sum(1 << slot for slot, count in enumerate(counts) if count >= value)
+        assert _at_least(slices, value) & every_slot == expected, value
+
+
+def test_cache_apply_advances_only_from_previous_generation():
+    cache = FoodIndexCache()
+    index = FoodIndex([("Apple", 95)])
+    cache.put("alice", 3, index)
+
+    cache.apply("alice", 4, upserts=[("Pear", 57)])
+    assert cache.get("alice", 4) is index
+    assert "Pear" in index
+
+    # Already at (or past) this generation: nothing to do
+    cache.apply("alice", 4, upserts=[("Plum", 30)])
+    assert "Plum" not in index
+    assert cache.get("alice", 4) is index
+
+
+def test_cache_apply_with_generation_gap_drops_entry():
+    cache = FoodIndexCache()
+    index = FoodIndex([("Apple", 95)])
+    cache.put("alice", 3, index)
+
+    # Generation 4 was never applied, so the index cannot be brought up to date in place
+    cache.apply("alice", 5, upserts=[("Pear", 57)])
+
+    assert "Pear" not in index
+    assert cache.get("alice", 5) is None
+    assert cache.get("alice", 3) is None
+    assert cache.stats()["entries"] == 0
+
+    # Nothing cached: apply is a no-op rather than creating an entry
+    cache.apply("alice", 6, upserts=[("Pear", 57)])
+    assert cache.stats()["entries"] == 0
@@ -0,0 +1,38 @@
+import db_handler_orm
+from food_catalog import FoodCatalog, build_index
+
+
+def test_food_search_prefix(client, profile):
+    db_handler_orm.set_food_calories(profile, "Apple", 95)
+    db_handler_orm.set_food_calories(profile, "Apricot", 17)
+    db_handler_orm.set_food_calories(profile, "Banana", 105)
+
+    response = client.get(f"/api/food_search?profile={profile}&q=ap")
+
+    assert response.status_code == 200
+    assert [food["name"] for food in response.get_json()["results"]] == ["Apple", "Apricot"]
+
+
+def test_food_search_is_not_rate_limited(client, profile):
+    db_handler_orm.set_food_calories(profile, "Apple", 95)
+
+    # Well past the default "50 per hour" limit, as typing into the search box would be
+    for i in range(120):
+        response = client.get(f"/api/food_search?profile={profile}&q=" + "apple"[:i % 5 + 1])
+        assert response.status_code == 200, f"request {i + 1} got {response.status_code}"
+        assert response.get_json()["results"], f"request {i + 1} returned no results"
+
+
+def test_catalog_foods_overridden_ignoring_case(client, profile, monkeypatch):
+    catalog = FoodCatalog(build_index([("broccoli", 34), ("Brown rice", 216), ("BROWNIE", 466)]))
+    monkeypatch.setattr(db_handler_orm, "get_catalog", lambda: catalog)
+    db_handler_orm.set_food_calories(profile, "Broccoli", 30)
+    db_handler_orm.set_food_calories(profile, "Brownie", 400)
+
+    response = client.get(f"/api/food_search?profile={profile}&q=br")
+
+    assert response.get_json()["results"] == [
+        {"name": "Broccoli", "calories": 30},
+        {"name": "Brownie", "calories": 400},
+        {"name": "Brown rice", "calories": 216},
+    ]
@@ -0,0 +1,88 @@
+import json
+
+import db_handler_orm
+
+RECORDS = [
+    {"type": "food", "name": "Apple", "calories": 95},
+    {"type": "entry", "date": "2024-01-01", "meal_type": "lunch", "food_id": "imp-1",
+     "name": "Apple", "calories": 95, "quantity": 1},
+    {"type": "entry", "date": "2024-01-01", "meal_type": "dinner", "food_id": "imp-2",
+     "name": "Rice", "calories": 400, "quantity": 2},
+    {"type": "weight", "date": "2024-01-01", "weight": 80.5},
+    {"type": "target", "date": "2024-01-01", "calories": 1800},
+]
+
+
+def _ndjson(lines):
+    return "\n".join(line if isinstance(line, str) else json.dumps(line) for line in lines).encode("utf-8")
+
+
+def _import(client, profile_name, body):
+    response = client.post(f"/api/import/{profile_name}", data=body, content_type="application/x-ndjson")
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_reimport_is_idempotent(client, profile):
+    first = _import(client, profile, _ndjson(RECORDS))
+    assert first["entries_inserted"] == 2
+    assert first["invalid"] == 0
+    log, totals = db_handler_orm.get_weekly_log(profile), db_handler_orm.get_weekly_data(profile)
+
+    second = _import(client, profile, _ndjson(RECORDS))
+
+    assert second["entries_inserted"] == 0
+    assert second["entries_updated"] == 2
+    assert db_handler_orm.get_weekly_log(profile) == log
+    assert db_handler_orm.get_weekly_data(profile) == totals == [{"date": "2024-01-01", "total_calories": 495}]
+    assert db_handler_orm.get_food_database(profile) == {"Apple": 95, "Rice": 200}
+    assert db_handler_orm.get_weights(profile) == {"2024-01-01": 80.5}
+
+
+def test_invalid_ndjson_lines_are_reported_and_skipped(client, profile, logged_entries):
+    body = _ndjson([
+        RECORDS[1],
+        "{not json",
+        "[1, 2]",
+        dict(RECORDS[2], meal_type="brunch"),
+        {"type": "entry", "date": "2024-13-01", "meal_type": "lunch", "name": "Pear", "calories": 57},
+        RECORDS[2],
+    ])
+
+    stats = _import(client, profile, body)
+
+    assert stats["rows"] == 6
+    assert stats["invalid"] == 4
+    assert stats["entries_inserted"] == 2
+    assert [error["record"] for error in stats["errors"]] == [2, 3, 4, 5]
+    assert stats["errors"][0]["error"].startswith("invalid JSON")
+    assert "brunch" in stats["errors"][2]["error"]
+    assert set(logged_entries(profile)) == {"imp-1", "imp-2"}
+
+
+def test_import_error_list_is_capped(profile):
+    stats = db_handler_orm.import_records(profile, [{"type": "bogus"}] * 30, max_errors=5)
+
+    assert stats["invalid"] == 30
+    assert len(stats["errors"]) == 5
+
+
+def test_conflicting_entries_do_not_add_foods(client, profile):
+    db_handler_orm.save_profile("bob", {})
+    _import(client, "bob", _ndjson(RECORDS[1:3]))
+
+    # Every entry's food_id belongs to bob, so alice gets neither the entries nor their foods
+    stats = _import(client, profile, _ndjson(RECORDS[1:3]))
+
+    assert stats["conflicts"] == 2
+    assert stats["entries_inserted"] == 0
+    assert stats["foods"] == 0
+    assert db_handler_orm.get_food_database(profile) == {}
+
+
+def test_foods_counts_only_new_foods(client, profile):
+    first = _import(client, profile, _ndjson(RECORDS))
+    assert first["foods"] == 2  # Apple (explicit) and Rice (implied by an entry)
+
+    second = _import(client, profile, _ndjson(RECORDS + [{"type": "food", "name": "Pear", "calories": 57}]))
+    assert second["foods"] == 1
@@ -0,0 +1,56 @@
+import pytest
+
+import CalorieApp
+import db_handler_orm
+
+TOKEN = "test-metrics-token"
+
+
+@pytest.fixture
+def scrape(client, monkeypatch):
+    """Enable /metrics and return a function that scrapes it as {sample: value}."""
+    monkeypatch.setattr(CalorieApp, "METRICS_TOKEN", TOKEN)
+
+    def get():
+        response = client.get("/metrics", headers={"Authorization": f"Bearer {TOKEN}"})
+        assert response.status_code == 200
+        assert response.mimetype == "text/plain"
+        return dict(line.rsplit(" ", 1) for line in response.get_data(as_text=True).splitlines()
+                    if not line.startswith("#"))
+    return get
+
+
+def test_metrics_disabled_without_token(client, monkeypatch):
+    monkeypatch.setattr(CalorieApp, "METRICS_TOKEN", None)
+    assert client.get("/metrics").status_code == 404
+
+
+def test_metrics_requires_token(client, scrape):
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    assert client.get(f"/metrics?token={TOKEN}").status_code == 200
+
+
+def test_metrics_record_requests_queries_and_pool(client, profile, scrape):
+    db_handler_orm.set_food_calories(profile, "Apple", 95)
+    labels = '{endpoint="/api/food_database/<profile_name>",method="GET"'
+    responses = f'calorietracker_http_responses_total{labels},status="200"}}'
+    before = float(scrape().get(responses, 0))
+
+    assert client.get(f"/api/food_database/{profile}").status_code == 200
+    samples = scrape()
+
+    assert float(samples[responses]) == before + 1
+    assert float(samples[f'calorietracker_http_request_duration_seconds_count{labels}}}']) >= 1
+    queries = '{endpoint="/api/food_database/<profile_name>"}'
+    assert float(samples[f"calorietracker_db_queries_per_request_sum{queries}"]) >= 1
+    assert float(samples["calorietracker_db_pool_checkouts_total"]) >= 1
+    assert "calorietracker_db_pool_wait_seconds_total" in samples
+    assert "calorietracker_db_pool_hold_seconds_total" in samples
+    assert 'calorietracker_cache_entries{cache="profile"}' in samples
+
+
+def test_metrics_is_not_rate_limited(client, scrape):
+    # Well past the default "50 per hour" limit, as a 15s scrape interval would be
+    for _ in range(60):
+        scrape()
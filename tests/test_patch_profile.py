@@ -0,0 +1,63 @@
+import pytest
+
+import db_handler_orm
+from db_handler_orm import ProfileConflictError
+
+
+def _version(profile_name):
+    return db_handler_orm.get_profile_data_version(profile_name)[0]
+
+
+def test_patch_sets_fields_and_bumps_version(profile):
+    version = _version(profile)
+
+    new_version = db_handler_orm.patch_profile(profile, {"weight_goal": 70, "units": "kg"})
+
+    assert new_version == version + 1 == _version(profile)
+    data = db_handler_orm.get_profile_data(profile)
+    assert data["weight_goal"] == 70
+    assert data["units"] == "kg"
+
+
+def test_patches_to_different_fields_are_both_kept(profile):
+    db_handler_orm.patch_profile(profile, {"weight_goal": 70})
+    db_handler_orm.patch_profile(profile, {"units": "kg"})
+
+    data = db_handler_orm.get_profile_data(profile)
+    assert (data["weight_goal"], data["units"]) == (70, "kg")
+
+
+def test_expected_version_match_applies(profile):
+    version = _version(profile)
+
+    assert db_handler_orm.patch_profile(profile, {"weight_goal": 70}, expected_version=version) == version + 1
+    assert db_handler_orm.get_weight_goal(profile) == 70
+
+
+def test_stale_expected_version_raises_conflict_and_changes_nothing(profile):
+    stale = _version(profile)
+    db_handler_orm.patch_profile(profile, {"weight_goal": 70})
+
+    with pytest.raises(ProfileConflictError) as excinfo:
+        db_handler_orm.patch_profile(profile, {"weight_goal": 65}, expected_version=stale)
+
+    assert excinfo.value.expected_version == stale
+    assert excinfo.value.current_version == stale + 1 == _version(profile)
+    assert db_handler_orm.get_weight_goal(profile) == 70
+
+
+def test_generic_dialect_path_checks_version(profile, monkeypatch):
+    # Dialects without JSON functions merge in Python under the same version guard
+    monkeypatch.setattr(db_handler_orm, "_json_patch_expression", lambda dialect, changes: None)
+    stale = _version(profile)
+
+    db_handler_orm.patch_profile(profile, {"weight_goal": 70})
+    with pytest.raises(ProfileConflictError):
+        db_handler_orm.patch_profile(profile, {"weight_goal": 65}, expected_version=stale)
+
+    assert db_handler_orm.get_weight_goal(profile) == 70
+
+
+def test_patch_missing_profile_raises():
+    with pytest.raises(ValueError):
+        db_handler_orm.patch_profile("nobody", {"weight_goal": 70})
@@ -0,0 +1,59 @@
+import threading
+import time
+
+import pytest
+from sqlalchemy import exc, text
+
+import db_orm
+
+
+def _hold_every_connection():
+    return [db_orm.engine.connect() for _ in range(db_orm.POOL_SIZE + db_orm.MAX_OVERFLOW)]
+
+
+def test_checkout_wait_and_hold_are_recorded():
+    before = db_orm.get_pool_stats()
+    held = _hold_every_connection()
+
+    def release_one():
+        time.sleep(0.2)
+        held.pop().close()
+
+    releaser = threading.Thread(target=release_one)
+    releaser.start()
+    with db_orm.get_session() as session:
+        session.execute(text("SELECT 1"))
+    releaser.join()
+    for connection in held:
+        connection.close()
+
+    stats = db_orm.get_pool_stats()
+    assert stats["checkouts"] > before["checkouts"]
+    assert stats["wait_seconds_total"] - before["wait_seconds_total"] >= 0.15
+    assert stats["wait_ms_max"] >= 150
+    assert stats["hold_seconds_total"] > before["hold_seconds_total"]
+    assert stats["checked_out"] == 0
+
+
+def test_pool_timeout_is_counted():
+    before = db_orm.get_pool_stats()["timeouts"]
+    held = _hold_every_connection()
+    try:
+        with pytest.raises(exc.TimeoutError):
+            with db_orm.get_session() as session:
+                session.execute(text("SELECT 1"))
+    finally:
+        for connection in held:
+            connection.close()
+
+    assert db_orm.get_pool_stats()["timeouts"] == before + 1
+
+
+def test_internal_stats_reports_pool(client, admin_token):
+    response = client.get(f"/internal/stats?token={admin_token}")
+
+    assert response.status_code == 200
+    pool = response.get_json()["pool"]
+    assert pool["pool_size"] == db_orm.POOL_SIZE
+    assert {"wait_ms_avg", "wait_ms_max", "hold_ms_avg", "timeouts"} <= set(pool)
+    assert client.get("/internal/stats?token=wrong").status_code == 401
@@ -0,0 +1,61 @@
+import os
+import subprocess
+
+import pytest
+from alembic.script import ScriptDirectory
+from sqlalchemy import text
+
+import start_app
+from db_orm import engine
+
+HEAD = ScriptDirectory(os.path.join(os.path.dirname(start_app.__file__), "migrations")).get_current_head()
+
+
+@pytest.fixture
+def alembic_version():
+    """Create alembic_version holding the given revision; dropped afterwards."""
+    def stamp(revision):
+        with engine.begin() as conn:
+            conn.execute(text("CREATE TABLE IF NOT EXISTS alembic_version (version_num VARCHAR(32) NOT NULL)"))
+            conn.execute(text("DELETE FROM alembic_version"))
+            conn.execute(text("INSERT INTO alembic_version (version_num) VALUES (:rev)"), {"rev": revision})
+    yield stamp
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE IF EXISTS alembic_version"))
+
+
+@pytest.fixture
+def launched(monkeypatch):
+    """Run start_app.main() with migrations and gunicorn replaced; returns what was launched."""
+    calls = []
+
+    def fake_run(args, **kwargs):
+        calls.append(args[1])
+        return subprocess.CompletedProcess(args, 0, "", "")
+
+    monkeypatch.setattr(start_app.subprocess, "run", fake_run)
+    monkeypatch.setattr(start_app.os, "execvp", lambda file, args: calls.append(file))
+
+    def main():
+        start_app.main()
+        return calls
+    return main
+
+
+def test_schema_at_head_skips_migrations(alembic_version, launched):
+    alembic_version(HEAD)
+
+    assert start_app.schema_is_current()
+    assert launched() == ["gunicorn"]
+
+
+def test_schema_behind_head_runs_migrations(alembic_version, launched):
+    alembic_version("a12af7e857f9")
+
+    assert not start_app.schema_is_current()
+    assert launched() == ["run_migrations.py", "gunicorn"]
+
+
+def test_missing_alembic_version_runs_migrations(launched):
+    assert not start_app.schema_is_current()
+    assert launched() == ["run_migrations.py", "gunicorn"]
@@ -0,0 +1,62 @@
+import db_handler_orm
+
+
+def _sync_all(profile_name, since=0, limit=2):
+    """Follow the cursor until has_more is false; return (pages, final cursor)."""
+    pages = []
+    while True:
+        page = db_handler_orm.get_changes(profile_name, since, limit)
+        assert page["cursor"] >= since
+        pages.append(page)
+        since = page["cursor"]
+        if not page["has_more"]:
+            return pages, since
+
+
+def test_get_changes_pages_through_every_change_once(profile, make_entry):
+    db_handler_orm.add_food_entries(profile, [make_entry(f"e{i}", date=f"2024-01-0{i + 1}") for i in range(5)])
+    db_handler_orm.log_weight(profile, "2024-01-01", 80)
+
+    pages, cursor = _sync_all(profile, limit=2)
+
+    assert all(len(page["changes"]["entry"]["upserted"]) <= 2 for page in pages)
+    entry_ids = [entry["id"] for page in pages for entry in page["changes"]["entry"]["upserted"]]
+    assert sorted(entry_ids) == ["e0", "e1", "e2", "e3", "e4"]
+    assert {name for page in pages for name in page["changes"]["food"]["upserted"]} == {"Apple"}
+    assert [page["changes"]["weight"]["upserted"] for page in pages if page["changes"]["weight"]["upserted"]] == [{"2024-01-01": 80}]
+
+    # Caught up: the same cursor comes back with nothing new
+    again = db_handler_orm.get_changes(profile, cursor, 2)
+    assert again["cursor"] == cursor
+    assert again["has_more"] is False
+    assert all(not changes["upserted"] and not changes["deleted"] for changes in again["changes"].values())
+
+
+def test_get_changes_returns_rechanged_and_deleted_rows_after_cursor(profile):
+    db_handler_orm.set_food_calories(profile, "Apple", 95)
+    db_handler_orm.set_food_calories(profile, "Pear", 57)
+    db_handler_orm.set_food_calories(profile, "Plum", 30)
+    _, cursor = _sync_all(profile)
+
+    db_handler_orm.set_food_calories(profile, "Apple", 100)
+    db_handler_orm.delete_food_from_database(profile, "Pear")
+
+    changes = db_handler_orm.get_changes(profile, cursor)["changes"]["food"]
+    assert changes == {"upserted": {"Apple": 100}, "deleted": ["Pear"]}
+
+
+def test_api_sync_follows_cursor(client, profile, make_entry):
+    db_handler_orm.add_food_entries(profile, [make_entry(f"e{i}") for i in range(3)])
+
+    seen, since = [], 0
+    for _ in range(10):
+        response = client.get(f"/api/sync?profile={profile}&since={since}&limit=1")
+        assert response.status_code == 200
+        body = response.get_json()
+        seen += [entry["id"] for entry in body["changes"]["entry"]["upserted"]]
+        since = body["cursor"]
+        if not body["has_more"]:
+            break
+
+    assert sorted(seen) == ["e0", "e1", "e2"]
+    assert client.get(f"/api/sync?profile={profile}&since=-1").status_code == 400
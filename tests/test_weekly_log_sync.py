@@ -0,0 +1,42 @@
+import datetime
+
+import db_handler_orm
+
+
+def test_non_divisible_batch_entry_survives_sync(profile, make_entry, logged_entries):
+    db_handler_orm.add_food_entries(profile, [
+        make_entry("odd", "Cookie", calories=101, quantity=2),
+        make_entry("even", "Apple", calories=190, quantity=2),
+    ])
+    db_handler_orm.set_food_calories(profile, "Apple", 100)
+
+    db_handler_orm.synchronize_weekly_log(profile, "2024-01-01", start="2024-01-01")
+
+    logged = logged_entries(profile)
+    assert logged["odd"]["calories"] == 101
+    assert logged["even"]["calories"] == 200
+
+
+def test_batch_entries_checked_against_final_per_unit_value(profile, make_entry, logged_entries):
+    db_handler_orm.add_food_entries(profile, [
+        make_entry("a", "Rice", calories=300),
+        make_entry("b", "Rice", calories=400, quantity=2, meal_type="dinner"),
+    ])
+
+    db_handler_orm.synchronize_weekly_log(profile, "2024-01-01", start="2024-01-01")
+
+    # Rice ends up at 200 per unit; the 300-calorie entry was logged by hand
+    assert db_handler_orm.get_food_database(profile) == {"Rice": 200}
+    assert {food_id: entry["calories"] for food_id, entry in logged_entries(profile).items()} == {"a": 300, "b": 400}
+
+
+def test_non_divisible_api_entry_survives_sync(client, profile, logged_entries):
+    today = datetime.date.today().isoformat()
+    response = client.post(f"/api/add_food?profile={profile}",
+                           json={"food_name": "Cookie", "meal_type": "snack", "calories": 101, "quantity": 2})
+    assert response.status_code == 200
+    food_id = response.get_json()["food_id"]
+
+    db_handler_orm.synchronize_weekly_log(profile, today, start=today)
+
+    assert logged_entries(profile)[food_id]["calories"] == 101